@@ -1,96 +1,579 @@
 import os
 import shutil
-import requests
-from PyPDF2 import PdfReader, PdfWriter
-from PIL import Image
 import os
-import smtplib
-import ssl
-import base64
 from dotenv import load_dotenv
-import convertapi
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from icalendar import Calendar, Event
+from email.mime.base import MIMEBase
+from email import encoders
 from datetime import datetime, timedelta
 import pytz
-import yfinance as yf
 import re
-import schedule
 import threading
 import time
+import tempfile
+import fnmatch
+import functools
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from file_index import file_digest
+from dedup import DEDUP_POLICIES, dedup_files, replace_with_link
+from rate_limit import TokenBucket, retry_with_backoff
+from smtp_pool import SMTPPool
+from scheduler import get_scheduler
+from market_data import get_quote_service
+from metrics import METRICS
 
-def compress_image(input_path, output_path, quality=60):
-    """Compress an image file by reducing quality."""
-    img = Image.open(input_path)
-    if img.mode == 'RGBA':
+# Functions the LLM may choose between; function_catalog.py describes only these in prompts
+TASK_FUNCTIONS = [
+    "categorize_and_move_files",
+    "compress_pdfs_in_folder",
+    "compress_images_in_folder",
+    "remind_me",
+    "add_calendar_invite",
+    "share_stock_price",
+    "send_email",
+]
+
+def _atomic_output(output_path):
+    """Return a temporary path next to output_path that keeps its extension.
+
+    Writing to this path and then calling os.replace() means readers never see a
+    half-written output file, even if the process dies mid-write.
+    """
+    directory, name = os.path.split(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=os.path.splitext(name)[1], dir=directory)
+    os.close(fd)
+    return tmp_path
+
+# Default decoded-pixel budget per image (bytes); larger images are downscaled on
+# decode where the format allows it, otherwise rejected, so workers never blow up
+IMAGE_MEMORY_BUDGET = 512 * 1024 * 1024
+
+def _decode_scale(size, bands, frames, memory_budget):
+    """Return the downscale factor (1, 2, 4, ...) needed to decode an image within memory_budget."""
+    scale = 1
+    if memory_budget:
+        while size[0] * size[1] * bands * frames / (scale * scale) > memory_budget:
+            scale *= 2
+    return scale
+
+def _compress_jpeg(img, limit, quality, scale):
+    # Let libjpeg decode at 1/2, 1/4 or 1/8 scale instead of decoding full size first
+    if scale > 1:
+        img.draft('RGB', (img.size[0] // scale, img.size[1] // scale))
+    elif limit:
+        img.draft('RGB', (limit, limit))
+    if img.mode not in ('RGB', 'L'):
         img = img.convert('RGB')
-    img.save(output_path, optimize=True, quality=quality)
-
-def categorize_and_move_files(directory, exclude_files=None):
-    """Organize files into appropriate category folders, excluding specified files."""
-    FILE_CATEGORIES = {
-        "PDFs": [".pdf"],
-        "Images": [".jpg", ".jpeg", ".png", ".gif"],
-        "Code": [".py", ".js", ".html", ".css", ".cpp", ".java"],
-        "Documents": [".docx", ".txt", ".xlsx", ".csv"]
-    }
+    if limit:
+        img.thumbnail((limit, limit))
+    return [img], {"quality": quality, "optimize": True, "progressive": True}
+
+def _compress_png(img, limit, quality, scale):
+    from PIL import Image
+
+    if limit:
+        img.thumbnail((limit, limit))
+    if img.mode in ('RGB', 'RGBA') and quality < 100:
+        # Palette quantization is where PNG size actually goes down; lower quality, fewer colours
+        colors = max(16, min(256, int(256 * quality / 75)))
+        method = Image.Quantize.FASTOCTREE if img.mode == 'RGBA' else Image.Quantize.MEDIANCUT
+        img = img.quantize(colors=colors, method=method)
+    return [img], {"optimize": True}
+
+def _compress_gif(img, limit, quality, scale):
+    from PIL import Image
+
+    frames, durations = [], []
+    for index in range(getattr(img, "n_frames", 1)):
+        img.seek(index)
+        frame = img.convert('RGBA')
+        if limit:
+            frame.thumbnail((limit, limit))
+        frames.append(frame.quantize(colors=256, method=Image.Quantize.FASTOCTREE))
+        durations.append(img.info.get("duration", 100))
+    options = {"optimize": True, "save_all": len(frames) > 1, "loop": img.info.get("loop", 0)}
+    if len(frames) > 1:
+        options.update(append_images=frames[1:], duration=durations, disposal=2)
+    return frames, options
+
+IMAGE_COMPRESSORS = {"JPEG": _compress_jpeg, "PNG": _compress_png, "GIF": _compress_gif}
+
+def compress_image(input_path, output_path, quality=60, max_dimension=None, memory_budget=IMAGE_MEMORY_BUDGET):
+    """Compress an image file by reducing quality, using a format-specific strategy.
+
+    JPEGs are re-encoded at `quality`, PNGs are palette-quantized and GIFs are
+    optimized frame by frame. The decoded size is estimated from the header
+    first: JPEGs too large for memory_budget are decoded at reduced scale,
+    other formats raise MemoryError instead of being loaded.
+
+    Args:
+        input_path (str): Image to compress
+        output_path (str): Where to write the compressed image
+        quality (int, optional): Quality percentage (0-100). Defaults to 60.
+        max_dimension (int, optional): Shrink so the longest side is at most this many pixels
+        memory_budget (int, optional): Maximum decoded size in bytes. Defaults to
+            IMAGE_MEMORY_BUDGET; None disables the check.
+    """
+    from PIL import Image  # Loaded on first use so organize-only runs start fast
+
+    with Image.open(input_path) as img:
+        fmt = img.format if img.format in IMAGE_COMPRESSORS else "JPEG"
+        frames = getattr(img, "n_frames", 1) if fmt == "GIF" else 1
+        bands = 4 if fmt == "GIF" else len(img.getbands())
+        scale = _decode_scale(img.size, bands, frames, memory_budget)
+        if scale > 1 and (img.format != "JPEG" or scale > 8):
+            raise MemoryError(f"{os.path.basename(input_path)} ({img.size[0]}x{img.size[1]}, {frames} frame(s)) "
+                              f"exceeds the {memory_budget} byte memory budget")
+        limit = max_dimension if max_dimension and max_dimension < max(img.size) else None
+        images, options = IMAGE_COMPRESSORS[fmt](img, limit, quality, scale)
+
+        tmp_path = _atomic_output(output_path)
+        try:
+            images[0].save(tmp_path, format=fmt, **options)
+            if not limit and scale == 1 and os.path.getsize(tmp_path) >= os.path.getsize(input_path):
+                # Re-encoding made it bigger (already optimized input); keep the original bytes
+                shutil.copyfile(input_path, tmp_path)
+            os.replace(tmp_path, output_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+FILE_CATEGORIES = {
+    "PDFs": [".pdf"],
+    "Images": [".jpg", ".jpeg", ".png", ".gif"],
+    "Code": [".py", ".js", ".html", ".css", ".cpp", ".java"],
+    "Documents": [".docx", ".txt", ".xlsx", ".csv"]
+}
+
+# Extension -> category lookup, built once instead of scanning every list per file
+EXTENSION_CATEGORIES = {ext: category for category, extensions in FILE_CATEGORIES.items() for ext in extensions}
+
+def _move_file(src, dst):
+    """Move src to dst without ever overwriting dst (raises FileExistsError instead).
+
+    On one filesystem this is a hardlink plus unlink, which fails atomically if
+    dst exists, unlike os.rename which silently replaces it on POSIX.
+    """
+    try:
+        os.link(src, dst, follow_symlinks=False)
+    except FileExistsError:
+        raise
+    except OSError:
+        # Cross-device moves (EXDEV) and filesystems without hardlinks fall back to copy + delete
+        if os.path.lexists(dst):
+            raise FileExistsError(f"{dst} already exists")
+        shutil.move(src, dst)
+        return
+    os.unlink(src)
+
+def _place_file(src, folder):
+    """Move src into folder, renaming it "name (1).ext", "name (2).ext", ... if the name is taken.
+
+    Returns:
+        str: The path the file ended up at.
+    """
+    stem, ext = os.path.splitext(os.path.basename(src))
+    # Timed as one move however many names are probed; only a move that fails counts as an error
+    with METRICS.timer("move"):
+        for attempt in range(10000):
+            dst = os.path.join(folder, f"{stem} ({attempt}){ext}" if attempt else f"{stem}{ext}")
+            try:
+                _move_file(src, dst)
+                return dst
+            except FileExistsError:
+                continue
+        raise FileExistsError(f"No free name for {os.path.basename(src)} in {folder}")
+
+def _flush_moves(directory, category, paths, summary, created):
+    """Move a batch of files into the category folder under directory.
+
+    Returns:
+        list: The new paths of the files that were moved.
+    """
+    category_path = os.path.join(directory, category)
+    if category not in created:
+        os.makedirs(category_path, exist_ok=True)
+        created.add(category)
+    moved = []
+    # Sorted, so within this batch which file of a name collision gets the " (1)" suffix does
+    # not depend on scandir order (across batches it does; see categorize_and_move_files)
+    for path in sorted(paths):
+        name = os.path.basename(path)
+        try:
+            moved.append(_place_file(path, category_path))
+            summary["moved"][category] = summary["moved"].get(category, 0) + 1
+        except OSError as e:
+            summary["errors"].append({"file": name, "error": str(e)})
+    paths.clear()
+    return moved
+
+def categorize_file(directory, file_path):
+    """Move a single file into its category folder under directory.
+
+    Returns:
+        str: The new path, or None if the extension has no category.
+    """
+    category = EXTENSION_CATEGORIES.get(os.path.splitext(file_path)[1].lower())
+    if category is None:
+        return None
+    category_path = os.path.join(directory, category)
+    os.makedirs(category_path, exist_ok=True)
+    return _place_file(file_path, category_path)
+
+def categorize_and_move_files(directory, exclude_files=None, batch_size=1000, recursive=False,
+                              max_depth=None, include=None, exclude=None, follow_symlinks=False, dedup=None):
+    """Organize files into appropriate category folders, excluding specified files.
+
+    Args:
+        directory (str): Directory to organize
+        exclude_files (list, optional): File names to leave in place
+        batch_size (int, optional): Number of moves queued per category before
+            they are flushed. Defaults to 1000.
+        recursive, max_depth, include, exclude, follow_symlinks: Walk options,
+            see iter_files(). Files found in subdirectories are moved into the
+            category folders at the top of directory.
+        dedup (str, optional): After moving, files whose content already exists
+            in their category folder are replaced by a hardlink ("hardlink") or
+            removed ("delete"). Defaults to the DEDUP_POLICY environment
+            variable, or no deduplication.
+
+    Name collisions never overwrite: the incoming file is renamed "name (1).ext",
+    "name (2).ext", ... (first free name). Each flush moves its files in source
+    path order, so which file keeps the plain name is deterministic as long as
+    a category gets at most batch_size files. Beyond that (large or recursive
+    runs) earlier flushes win, and which files they hold depends on walk order;
+    pass a larger batch_size when the naming has to be reproducible.
+
+    Returns:
+        dict: ``moved`` (category -> number of files), ``skipped`` (number of
+        files left in place), ``duplicates`` and ``bytes_reclaimed`` (dedup
+        results) and ``errors`` (list of ``{"file", "error"}``).
+    """
+    exclude_files = set(exclude_files or ())
+    dedup = dedup or os.getenv('DEDUP_POLICY') or None
+    if dedup is not None and dedup not in DEDUP_POLICIES:
+        raise ValueError(f"Unknown dedup policy '{dedup}'. Choose from: {', '.join(DEDUP_POLICIES)}")
+    summary = {"moved": {}, "skipped": 0, "duplicates": 0, "bytes_reclaimed": 0, "errors": []}
+    pending = {category: [] for category in FILE_CATEGORIES}
+    arrivals = {category: [] for category in FILE_CATEGORIES}
+    created = set()
 
     print("\n=== Starting File Organization ===")
     print(f"1. Scanning directory: {directory}")
-    print("2. Creating category folders as needed:")
-    for category in FILE_CATEGORIES:
-        print(f"   - {category}")
-
-    for file in os.listdir(directory):
-        file_path = os.path.join(directory, file)
-        if os.path.isfile(file_path) and (exclude_files is None or file not in exclude_files):
-            ext = os.path.splitext(file)[1].lower()
-            for category, extensions in FILE_CATEGORIES.items():
-                if ext in extensions:
-                    category_path = os.path.join(directory, category)
-                    os.makedirs(category_path, exist_ok=True)
-                    shutil.move(file_path, os.path.join(category_path, file))
-                    print(f"✓ Completed: {file} -> {category}/")
+
+    # DirEntry.is_file() uses the type cached by scandir, no extra stat call
+    for entry in iter_files(directory, recursive=recursive, max_depth=max_depth, include=include,
+                            exclude=exclude, follow_symlinks=follow_symlinks, skip_dirs=FILE_CATEGORIES):
+        if entry.name in exclude_files:
+            continue
+        category = EXTENSION_CATEGORIES.get(os.path.splitext(entry.name)[1].lower())
+        if category is None:
+            summary["skipped"] += 1
+            continue
+        pending[category].append(entry.path)
+        if len(pending[category]) >= batch_size:
+            moved = _flush_moves(directory, category, pending[category], summary, created)
+            if dedup:
+                arrivals[category].extend(moved)
+
+    for category, paths in pending.items():
+        if paths:
+            moved = _flush_moves(directory, category, paths, summary, created)
+            if dedup:
+                arrivals[category].extend(moved)
+
+    print("2. Files moved per category:")
+    for category, count in summary["moved"].items():
+        print(f"   ✓ {category}/: {count}")
+
+    if dedup:
+        # Before any compression, so duplicates are not compressed (or uploaded) twice
+        for category, paths in arrivals.items():
+            if paths:
+                result = dedup_files(os.path.join(directory, category), paths, dedup)
+                summary["duplicates"] += result["duplicates"]
+                summary["bytes_reclaimed"] += result["bytes_reclaimed"]
+                summary["errors"].extend(result["errors"])
+        action = "hardlinked" if dedup == "hardlink" else "removed"
+        print(f"3. Duplicates {action}: {summary['duplicates']} ({summary['bytes_reclaimed']} bytes reclaimed)")
+    for error in summary["errors"]:
+        print(f"   ✗ {error['file']}: {error['error']}")
 
     print("\n=== Organization Complete ===")
+    return summary
+
+def _matches_any(patterns, name, rel_path):
+    """Return True if the file name or its path relative to the walk root matches a glob."""
+    return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(rel_path, pattern) for pattern in patterns)
+
+def iter_files(root, recursive=False, max_depth=None, include=None, exclude=None,
+               follow_symlinks=False, skip_dirs=None):
+    """Lazily yield os.DirEntry objects for the files under root.
+
+    Directories are streamed with os.scandir, so memory grows with the depth of
+    the tree rather than the number of files in it.
+
+    Args:
+        root (str): Directory to walk
+        recursive (bool, optional): Descend into subdirectories. Defaults to False.
+        max_depth (int, optional): Deepest subdirectory level to enter when
+            recursive (0 is root only). Defaults to no limit.
+        include (list, optional): Glob patterns; when given, only matching files
+            are yielded. Patterns are tried against the name and relative path.
+        exclude (list, optional): Glob patterns for files and directories to skip
+        follow_symlinks (bool, optional): Descend into symlinked directories.
+            Directories already on the current path are skipped, so symlink
+            loops terminate. Defaults to False.
+        skip_dirs (list, optional): Directory names to skip directly under root
+            (for example the organizer's own category folders)
+    """
+    include = list(include or ())
+    exclude = list(exclude or ())
+    skip_dirs = set(skip_dirs or ())
+    root_stat = os.stat(root)
+    # Stack of (scandir iterator, depth, relative dir, (st_dev, st_ino)); the keys of
+    # the directories currently open form the ancestor chain used for loop detection.
+    stack = [(os.scandir(root), 0, "", (root_stat.st_dev, root_stat.st_ino))]
+    ancestors = {stack[0][3]}
+    # Time spent walking, excluding the time the caller spends on each yielded file
+    scanned, busy, resumed = 0, 0.0, time.perf_counter()
+    try:
+        while stack:
+            entries, depth, rel_dir, key = stack[-1]
+            entry = next(entries, None)
+            if entry is None:
+                entries.close()
+                ancestors.discard(key)
+                stack.pop()
+                continue
+            rel_path = os.path.join(rel_dir, entry.name)
+            if exclude and _matches_any(exclude, entry.name, rel_path):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=follow_symlinks):
+                    if not recursive or (max_depth is not None and depth >= max_depth):
+                        continue
+                    if depth == 0 and entry.name in skip_dirs:
+                        continue
+                    entry_stat = entry.stat(follow_symlinks=follow_symlinks)
+                    child_key = (entry_stat.st_dev, entry_stat.st_ino)
+                    if child_key in ancestors:
+                        continue  # Symlink loop back to a directory on the current path
+                    stack.append((os.scandir(entry.path), depth + 1, rel_path, child_key))
+                    ancestors.add(child_key)
+                elif entry.is_file(follow_symlinks=follow_symlinks):
+                    if not include or _matches_any(include, entry.name, rel_path):
+                        scanned += 1
+                        busy += time.perf_counter() - resumed
+                        yield entry
+                        resumed = time.perf_counter()
+            except OSError as e:
+                print(f"✗ Cannot access {entry.path}: {str(e)}")
+    finally:
+        for entries, *_ in stack:
+            entries.close()
+        METRICS.observe("scan", busy + time.perf_counter() - resumed, count=scanned)
+
+def _unique_inodes(entries, links, follow_symlinks=False):
+    """Yield one entry per inode, so hardlinked files are processed once.
+
+    Later names of an inode that was already yielded are collected in
+    links[path of the first name] instead of being yielded.
+    """
+    first_names = {}
+    for entry in entries:
+        try:
+            st = entry.stat(follow_symlinks=follow_symlinks)
+        except OSError:
+            yield entry
+            continue
+        key = (st.st_dev, st.st_ino)
+        # Looked up whatever st_nlink is now: the first name may already be compressed and removed
+        if key in first_names:
+            links.setdefault(first_names[key], []).append(entry.path)
+            continue
+        if st.st_nlink > 1:
+            first_names[key] = entry.path
+        yield entry
+
+def _relink_outputs(results, links, source_of, output_of):
+    """Point the other names of each compressed inode at the compressed output.
+
+    Compression writes a new file, which breaks any hardlinks the original had
+    (e.g. from dedup). For every successful result, each other name `path` in
+    links[source_of(result)] is made a hardlink to the result's output at
+    output_of(path), and listed in the result's ``links``.
+    """
+    for result in results:
+        result["links"] = []
+        if result["error"]:
+            continue
+        for path in links.get(source_of(result), ()):
+            output = output_of(path)
+            try:
+                replace_with_link(result["output"], output)
+                if output != path:
+                    os.remove(path)
+                result["links"].append(output)
+            except OSError as e:
+                print(f"✗ Cannot link {os.path.basename(output)} to {os.path.basename(result['output'])}: {str(e)}")
+
+def _compress_image_job(file_path, compressed_path, quality, max_dimension=None, memory_budget=IMAGE_MEMORY_BUDGET):
+    """Compress one image and return its result record (runs inside a worker process)."""
+    started = time.perf_counter()
+    result = {
+        "file": os.path.basename(file_path),
+        "output": compressed_path,
+        "bytes_in": 0,
+        "bytes_out": 0,
+        "bytes_saved": 0,
+        "elapsed": 0.0,
+        "digest": None,
+        "error": None,
+    }
+    try:
+        result["bytes_in"] = os.path.getsize(file_path)
+        compress_image(file_path, compressed_path, quality, max_dimension, memory_budget)
+        result["bytes_out"] = os.path.getsize(compressed_path)
+        result["bytes_saved"] = result["bytes_in"] - result["bytes_out"]
+        result["digest"] = file_digest(compressed_path)
+        # Remove original file after successful compression
+        os.remove(file_path)
+    except Exception as e:
+        result["error"] = str(e)
+    result["elapsed"] = time.perf_counter() - started
+    return result
 
-def compress_images_in_folder(folder_path, quality=60):
+def _record_compression(stage, results):
+    """Add compression result records to the run metrics (workers may be separate processes)."""
+    for result in results:
+        METRICS.observe(stage, result["elapsed"], errors=int(bool(result["error"])),
+                        bytes_in=result["bytes_in"], bytes_out=result["bytes_out"])
+
+def compress_images_in_folder(folder_path, quality=60, workers=None, max_in_flight=None, recursive=False,
+                              max_depth=None, include=None, exclude=None, follow_symlinks=False, index=None,
+                              max_dimension=None, memory_budget=IMAGE_MEMORY_BUDGET):
     """Compress all images in a given folder using Python image compression libraries.
     
     Args:
         folder_path (str): Path to the folder containing images
         quality (int, optional): Quality percentage (0-100). Defaults to 60.
+        workers (int, optional): Number of worker processes. Defaults to the CPU
+            count; 1 compresses in the current process.
+        max_in_flight (int, optional): Maximum number of images submitted to the
+            pool at once, so memory stays flat on huge folders. Defaults to
+            twice the worker count.
+        recursive, max_depth, include, exclude, follow_symlinks: Walk options,
+            see iter_files(). Compressed files are written next to the originals.
+        index (FileIndex, optional): Skip images whose content was already
+            compressed and record every new output.
+        max_dimension (int, optional): Shrink images so the longest side is at
+            most this many pixels.
+        memory_budget (int, optional): Per-worker decoded image budget in bytes,
+            see compress_image().
+
+    Returns:
+        list[dict]: One record per compressed image with ``file``, ``output``,
+        ``bytes_in``, ``bytes_out``, ``bytes_saved``, ``elapsed`` (seconds),
+        ``digest``, ``error`` and ``links``. Hardlinked images are compressed
+        once; ``links`` lists the outputs of their other names, which are
+        hardlinks to ``output`` and not counted again in the byte totals.
     """
     print(f"\n=== Starting Image Compression in {folder_path} ===")
     supported_extensions = ['.jpg', '.jpeg', '.png', '.gif']
-    
-    for file in os.listdir(folder_path):
-        file_path = os.path.join(folder_path, file)
-        if os.path.isfile(file_path):
-            ext = os.path.splitext(file)[1].lower()
-            if ext in supported_extensions:
-                print(f"\nCompressing image: {file}")
-                try:
-                    # Create a compressed version with '_compressed' suffix
-                    compressed_path = os.path.join(folder_path, f"compressed_{file}")
-                    compress_image(file_path, compressed_path, quality)
-                    # Remove original file after successful compression
-                    os.remove(file_path)
-                    print(f"✓ Removed original file: {file}")
-                except Exception as e:
-                    print(f"✗ Error compressing {file}: {str(e)}")
-    
-    print("\n=== Image Compression Complete ===")
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 2
 
-def compress_pdf(input_path):
-    """Compress a PDF file using ConvertAPI with enhanced error handling.
-    
-    Args:
-        input_path (str): Path to the input PDF file
-        output_path (str): Path to save the compressed PDF file
+    def compressed_path_for(path):
+        # Create a compressed version with 'compressed_' prefix
+        return os.path.join(os.path.dirname(path), f"compressed_{os.path.basename(path)}")
+
+    def images():
+        for entry in iter_files(folder_path, recursive=recursive, max_depth=max_depth, include=include,
+                                exclude=exclude, follow_symlinks=follow_symlinks):
+            # Outputs land in the directories being walked, so never pick them up again
+            if entry.name.startswith("compressed_"):
+                continue
+            if os.path.splitext(entry.name)[1].lower() in supported_extensions:
+                yield entry
+
+    links = {}
+
+    def jobs():
+        for entry in _unique_inodes(images(), links, follow_symlinks):
+            if index is not None and not index.needs_processing(entry.path, "compress_image"):
+                continue
+            yield entry.path, compressed_path_for(entry.path), quality, max_dimension, memory_budget
+
+    results = []
+    if workers == 1:
+        results = [_compress_image_job(*job) for job in jobs()]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            for job in jobs():
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    results.extend(future.result() for future in done)
+                pending.add(pool.submit(_compress_image_job, *job))
+            results.extend(future.result() for future in wait(pending).done)
 
+    _relink_outputs(results, links, lambda result: os.path.join(os.path.dirname(result["output"]), result["file"]),
+                    compressed_path_for)
+    _record_compression("image_compress", results)
+    if index is not None:
+        for result in results:
+            if not result["error"]:
+                for output in [result["output"], *result["links"]]:
+                    index.record(output, "compress_image", result["digest"])
+
+    failed = sum(1 for result in results if result["error"])
+    saved = sum(result["bytes_saved"] for result in results)
+    print(f"\n=== Image Compression Complete: {len(results) - failed} compressed, {failed} failed, {saved} bytes saved ===")
+    return results
+
+def compress_file(file_path, quality=60, index=None, retries=2, backend=None):
+    """Compress one file according to its type: images get a compressed_ copy, PDFs are compressed in place.
+
+    retries and backend apply to PDFs as in compress_pdfs_in_folder().
+
+    Returns:
+        dict: The result record (see compress_images_in_folder), or None if the
+        file type is not compressible or the index says it is already done.
     """
+    ext = os.path.splitext(file_path)[1].lower()
+    name = os.path.basename(file_path)
+    if ext in FILE_CATEGORIES["Images"] and not name.startswith("compressed_"):
+        if index is not None and not index.needs_processing(file_path, "compress_image"):
+            return None
+        result = _compress_image_job(file_path, os.path.join(os.path.dirname(file_path), f"compressed_{name}"), quality)
+        _record_compression("image_compress", [result])
+        if index is not None and not result["error"]:
+            index.record(result["output"], "compress_image", result["digest"])
+        return result
+    if ext == ".pdf":
+        if index is not None and not index.needs_processing(file_path, "compress_pdf"):
+            return None
+        backend, retries = _pdf_backend_options(backend, retries)
+        result = _compress_pdf_job(file_path, None, retries=retries, backend=backend)
+        _record_compression("pdf_compress", [result])
+        if index is not None and not result["error"]:
+            index.record(file_path, "compress_pdf")
+        return result
+    return None
+
+@functools.lru_cache(maxsize=None)
+def _convertapi_client():
+    """Configure and return the ConvertAPI client once per process.
+
+    Reads CONVERTAPI_SECRET from the environment / .env file. CONVERTAPI_BASE_URI
+    overrides the service endpoint, e.g. to point at fakes.FakeConvertAPIServer.
+    """
+    import convertapi
+
     load_dotenv()
     api_key = os.getenv('CONVERTAPI_SECRET')
     
@@ -98,193 +581,444 @@ def compress_pdf(input_path):
         raise ValueError("ConvertAPI secret key not found in .env file")
     
     convertapi.api_credentials = api_key
+    base_uri = os.getenv('CONVERTAPI_BASE_URI')
+    if base_uri:
+        convertapi.base_uri = base_uri
+
+    class SessionReusingClient(convertapi.Client):
+        """Client that keeps one HTTP session, and so its connection pool, per thread.
+
+        The stock client builds a new requests.Session for every upload, convert
+        and download call, paying a fresh TCP+TLS handshake each time.
+        """
+        _local = threading.local()
+
+        def _Client__session(self):
+            session = getattr(self._local, "session", None)
+            if session is None:
+                session = super()._Client__session()
+                self._local.session = session
+            return session
+
+    convertapi.client = SessionReusingClient()
+    return convertapi
+
+class ConvertAPIError(Exception):
+    """A ConvertAPI failure (e.g. 429 or 503) as an ordinary Exception.
+
+    The SDK's errors derive from BaseException, so they would slip past
+    `except Exception` and never be retried.
+    """
+
+def _compress_pdf_convertapi(input_path):
+    """Compress a PDF file in place using ConvertAPI."""
+    client = _convertapi_client()
+    tmp_path = _atomic_output(input_path)
+    try:
+        try:
+            client.convert('compress', {
+                        'File': input_path
+                    }, from_format='pdf').save_files(tmp_path)
+        except client.exceptions.BaseError as e:
+            raise ConvertAPIError(str(e)) from e
+        os.replace(tmp_path, input_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _compress_pdf_local(input_path):
+    """Compress a PDF file in place with the offline PyPDF2/Pillow backend."""
+    from pdf_local import compress_pdf_local  # PyPDF2 is only imported when this backend runs
+
+    compress_pdf_local(input_path)
+
+# Available compress_pdf backends; "local" needs no network access
+PDF_BACKENDS = {
+    "convertapi": _compress_pdf_convertapi,
+    "local": _compress_pdf_local,
+}
+
+def compress_pdf(input_path, backend=None):
+    """Compress a PDF file in place.
+    
+    Args:
+        input_path (str): Path to the PDF file; it is replaced by the compressed version
+        backend (str, optional): One of PDF_BACKENDS. Defaults to the PDF_BACKEND
+            environment variable, or "convertapi".
+
+    """
+    backend = backend or os.getenv('PDF_BACKEND', 'convertapi')
+    if backend not in PDF_BACKENDS:
+        raise ValueError(f"Unknown PDF backend '{backend}'. Choose from: {', '.join(PDF_BACKENDS)}")
+    PDF_BACKENDS[backend](input_path)
 
-    result = convertapi.convert('compress', {
-                'File': input_path
-            }, from_format='pdf').save_files(input_path)
-        
+def _pdf_backend_options(backend, retries):
+    """Resolve the PDF backend (argument, then PDF_BACKEND) and the retries it gets.
 
-def compress_pdfs_in_folder(folder_path):
-    """Compress all PDFs in a given folder using the updated compress_pdf function with retry logic.
+    Local compression fails deterministically, so it is never retried.
+    """
+    backend = backend or os.getenv('PDF_BACKEND', 'convertapi')
+    return backend, 0 if backend == "local" else retries
+
+def _compress_pdf_job(file_path, bucket, retries, backend=None):
+    """Compress one PDF with rate limiting and retries and return its result record."""
+    file = os.path.basename(file_path)
+    started = time.perf_counter()
+    result = {"file": file, "output": file_path, "bytes_in": 0, "bytes_out": 0, "bytes_saved": 0,
+              "elapsed": 0.0, "attempts": 0, "error": None}
+
+    def attempt():
+        result["attempts"] += 1
+        if bucket is not None:
+            bucket.acquire()
+        compress_pdf(file_path, backend)
+
+    def on_retry(attempt_number, e, delay):
+        print(f"✗ Error compressing {file} (Attempt {attempt_number}/{retries + 1}): {str(e)}; retrying in {delay:.1f}s")
+
+    try:
+        result["bytes_in"] = os.path.getsize(file_path)
+        retry_with_backoff(attempt, retries=retries, on_retry=on_retry)
+        result["bytes_out"] = os.path.getsize(file_path)
+        result["bytes_saved"] = result["bytes_in"] - result["bytes_out"]
+    except Exception as e:
+        result["error"] = str(e)
+        print(f"✗ Cannot compress {file} after {result['attempts']} attempts. Moving on.")
+    result["elapsed"] = time.perf_counter() - started
+    return result
+
+def compress_pdfs_in_folder(folder_path, recursive=False, max_depth=None, include=None, exclude=None,
+                            follow_symlinks=False, index=None, workers=4, rate=None, retries=2, backend=None):
+    """Compress all PDFs in a given folder concurrently, with rate limiting and retry logic.
     
     Args:
         folder_path (str): Path to the folder containing PDFs
+        recursive, max_depth, include, exclude, follow_symlinks: Walk options,
+            see iter_files().
+        index (FileIndex, optional): Skip PDFs that were already compressed and
+            have not changed since, and record every newly compressed PDF.
+        workers (int, optional): Maximum number of concurrent ConvertAPI requests,
+            or worker processes for the local backend. Defaults to 4.
+        rate (float, optional): Maximum ConvertAPI requests per second across all
+            workers (token bucket). Defaults to no limit.
+        retries (int, optional): Retries per file, with exponential backoff and
+            jitter. Defaults to 2.
+        backend (str, optional): compress_pdf backend, see PDF_BACKENDS.
+
+    Returns:
+        list[dict]: One record per compressed PDF with ``file``, ``output``,
+        ``bytes_in``, ``bytes_out``, ``bytes_saved``, ``elapsed``, ``attempts``,
+        ``error`` and ``links`` (other hardlinked names of the PDF, compressed
+        once and re-linked to ``output``).
     """
     print(f"\n=== Starting PDF Compression in {folder_path} ===")
-    
-    for file in os.listdir(folder_path):
-        file_path = os.path.join(folder_path, file)
-        if os.path.isfile(file_path) and file.lower().endswith('.pdf'):
-            attempt = 0
-            success = False
-            while attempt < 3 and not success:
-                try:
-                    print(f"\nCompressing PDF: {file} (Attempt {attempt + 1}/3)")
-                    # Use the same path for input and output to replace the original file
-                    compress_pdf(file_path)
-                    print(f"✓ Successfully compressed: {file}")
-                    success = True
-                except Exception as e:
-                    attempt += 1
-                    print(f"✗ Error compressing {file} (Attempt {attempt}/3): {str(e)}")
-                    if attempt >= 3:
-                        print(f"✗ Cannot compress {file} after 3 attempts. Moving on.")
-    
-    print("\n=== PDF Compression Complete ===")
+    backend, retries = _pdf_backend_options(backend, retries)
+    local = backend == "local"
+    # Local compression is CPU-bound and runs in processes; ConvertAPI calls are
+    # network-bound and share a rate limiter across threads
+    bucket = TokenBucket(rate) if rate and not local else None
+    executor = ProcessPoolExecutor if local else ThreadPoolExecutor
+    results = []
 
-def send_email(subject, body, to_email, from_email="ajaynadimpallikumar@gmail.com"):
-    """Send an email using SMTP."""
+    links = {}
+
+    def pdfs():
+        for entry in iter_files(folder_path, recursive=recursive, max_depth=max_depth, include=include,
+                                exclude=exclude, follow_symlinks=follow_symlinks):
+            if entry.name.lower().endswith('.pdf'):
+                yield entry
+
+    def files():
+        for entry in _unique_inodes(pdfs(), links, follow_symlinks):
+            if index is not None and not index.needs_processing(entry.path, "compress_pdf"):
+                print(f"↷ Skipping unchanged PDF: {entry.name}")
+                continue
+            yield entry.path
+
+    with executor(max_workers=workers) as pool:
+        pending = set()
+        for file_path in files():
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                results.extend(future.result() for future in done)
+            pending.add(pool.submit(_compress_pdf_job, file_path, bucket, retries=retries, backend=backend))
+        results.extend(future.result() for future in wait(pending).done)
+
+    # Compressing in place replaced the first name's inode; link the other names to the new one
+    _relink_outputs(results, links, lambda result: result["output"], lambda path: path)
+    _record_compression("pdf_compress", results)
+    if index is not None:
+        for result in results:
+            if not result["error"]:
+                for output in [result["output"], *result["links"]]:
+                    index.record(output, "compress_pdf")
+
+    failed = sum(1 for result in results if result["error"])
+    saved = sum(result["bytes_saved"] for result in results)
+    print(f"\n=== PDF Compression Complete: {len(results) - failed} compressed, {failed} failed, {saved} bytes saved ===")
+    return results
+
+@functools.lru_cache(maxsize=None)
+def _smtp_pool(from_email):
+    """Return the shared SMTP connection pool for from_email, created on first use.
+
+    SMTP_HOST, SMTP_PORT and SMTP_STARTTLS override the Gmail defaults, e.g. to
+    point at fakes.FakeSMTPServer.
+    """
     load_dotenv()
-    email_password = os.getenv('EMAIL_PASSWORD')  # Your app password
-    email_smtp_server = "smtp.gmail.com"
-    email_smtp_port = 587
+    return SMTPPool(
+        os.getenv('SMTP_HOST', "smtp.gmail.com"),
+        int(os.getenv('SMTP_PORT', 587)),
+        username=from_email,
+        password=os.getenv('EMAIL_PASSWORD'),  # Your app password
+        starttls=os.getenv('SMTP_STARTTLS', '1') != '0',
+    )
 
+def _attachment_part(filename, content, mimetype):
+    """Build a MIME part for an in-memory attachment (bytes or str)."""
+    maintype, _, subtype = mimetype.partition("/")
+    subtype, *params = [p.strip() for p in subtype.split(";")]
+    if maintype == "text":
+        text = content.decode("utf-8") if isinstance(content, bytes) else content
+        part = MIMEText(text, subtype, "utf-8")
+    else:
+        part = MIMEBase(maintype, subtype)
+        part.set_payload(content)
+        encoders.encode_base64(part)
+    for param in params:
+        key, _, value = param.partition("=")
+        part.set_param(key, value)
+    part.add_header("Content-Disposition", "attachment", filename=filename)
+    return part
+
+def _build_email(subject, body, to_email, from_email, attachments=None):
     msg = MIMEMultipart()
     msg['From'] = from_email
     msg['To'] = to_email
     msg['Subject'] = subject
 
     msg.attach(MIMEText(body, 'plain'))
+    for filename, content, mimetype in attachments or ():
+        msg.attach(_attachment_part(filename, content, mimetype))
+    return msg
+
+def send_email(subject, body, to_email, from_email="ajaynadimpallikumar@gmail.com", attachments=None):
+    """Send an email using SMTP.
+
+    Args:
+        attachments (list, optional): (filename, content, mimetype) tuples built
+            in memory, e.g. ("invite.ics", ics_bytes, "text/calendar; method=REQUEST")
+
+    Returns:
+        str: None if the email was sent, otherwise the error message.
+    """
+    msg = _build_email(subject, body, to_email, from_email, attachments)
 
     try:
-        # Establish connection to the SMTP server
-        server = smtplib.SMTP(email_smtp_server, email_smtp_port)
-        server.ehlo()
-        server.starttls()  # Secure the connection
-        server.ehlo()
-        server.login(from_email, email_password)
-        text = msg.as_string()
-        server.sendmail(from_email, to_email, text)
-        server.quit()
+        # Reuses a pooled, already logged-in connection when one is available
+        _smtp_pool(from_email).send(msg)
         print(f"Email sent to {to_email}")
+        return None
     except Exception as e:
         print(f"Failed to send email: {str(e)}")
+        return str(e)
 
-def remind_me(subject, body, to_email):
-    """Send a reminder email."""
-    send_email(subject, body, to_email)
-
-def share_stock_price(to_email, time_str, symbol='NVDA', retries=3, wait_time=5):
-    """Share the stock price for a given symbol via email at a scheduled time (sends ASAP if time matches and always schedules)."""
-    def get_stock_price():
-        """Get the current stock price for the given symbol using Yahoo Finance with retry logic."""
-        for attempt in range(retries):
-            try:
-                data = yf.download(symbol, period="1d")
-                print(data["Close"].iloc[-1])
-                if data.empty:
-                    raise ValueError("Empty stock data returned. Check symbol or try later.")
+def send_emails(emails, from_email="ajaynadimpallikumar@gmail.com"):
+    """Send many emails over a single SMTP session.
 
+    Args:
+        emails (list): Dicts with ``subject``, ``body`` and ``to_email`` keys,
+            and optionally ``attachments`` (see send_email)
+        from_email (str, optional): Sender address
 
-                return data['open'][0]  # Successfully retrieved price
+    Returns:
+        list: One entry per email, None if it was sent or the error message.
+    """
+    emails = list(emails)
+    messages = [_build_email(e["subject"], e["body"], e["to_email"], from_email, e.get("attachments"))
+                for e in emails]
+    try:
+        results = _smtp_pool(from_email).send_bulk(messages)
+    except Exception as e:
+        results = [e] * len(messages)
+    for email, error in zip(emails, results):
+        if error is None:
+            print(f"Email sent to {email['to_email']}")
+        else:
+            print(f"Failed to send email to {email['to_email']}: {str(error)}")
+    return [None if error is None else str(error) for error in results]
 
-            except Exception as e:
-                
-                print(f"❌ Failed to retrieve stock price (Attempt {attempt+1}/{retries}): {str(e)}")
+def remind_me(subject, body, to_email):
+    """Send a reminder email. Returns None on success, otherwise the error message (see send_email)."""
+    return send_email(subject, body, to_email)
 
-                if "Rate limited" in str(e) or "Too Many Requests" in str(e):
-                    wait_time *= 2  # Exponential backoff
-                    print(f"🔄 Retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
-                else:
-                    break  # Do not retry for other errors
+def get_stock_price(symbol='NVDA', retries=3, wait_time=5):
+    """Get the current stock price for the given symbol from the shared quote service.
 
+    Concurrent requests for the same symbol share one fetch, symbols requested
+    together are downloaded in a single call, and prices are cached briefly.
+    """
+    price = get_quote_service().get_quote(symbol, retries=retries, backoff=wait_time)
+    if price is None:
         print("❌ Unable to fetch stock price after multiple attempts.")
-        return None
+    return price
 
-    def send_stock_email():
-        """Send an email with the latest stock price."""
-        stock_price = get_stock_price()
-        if stock_price is None:
-            print("❌ Skipping email: Stock price unavailable.")
-            return
+def send_stock_email(to_email, symbol='NVDA', retries=3, wait_time=5):
+    """Send an email with the latest stock price."""
+    stock_price = get_stock_price(symbol, retries, wait_time)
+    if stock_price is None:
+        print("❌ Skipping email: Stock price unavailable.")
+        return
 
-        subject = f"{symbol} Stock Price Update"
-        body = f"The current stock price for {symbol} is ${stock_price:.2f}."
-        send_email(subject, body, to_email)
+    subject = f"{symbol} Stock Price Update"
+    body = f"The current stock price for {symbol} is ${stock_price:.2f}."
+    send_email(subject, body, to_email)
 
+def share_stock_price(to_email, time_str, symbol='NVDA', retries=3, wait_time=5):
+    """Share the stock price for a given symbol via email at a scheduled time daily.
+
+    If the time passed within the last minute, today's email is sent right away
+    and the schedule starts tomorrow, so each due time is sent exactly once.
+    """
     try:
         # Validate & convert time
-        match = re.fullmatch(r"(\d{1,2})(?::(\d{2}))?\s?(AM|PM)", time_str.strip(), re.IGNORECASE)
+        match = re.fullmatch(r"(\d{1,2})(?::(\d{2}))?(?::(\d{2}))?\s?(AM|PM)", time_str.strip(), re.IGNORECASE)
         if not match:
-            raise ValueError("Invalid time format! Use 'H AM/PM' or 'H:MM AM/PM'.")
+            raise ValueError("Invalid time format! Use 'H AM/PM', 'H:MM AM/PM' or 'H:MM:SS AM/PM'.")
 
         # Convert input time to 24-hour format
-        X_PM_24H = datetime.strptime(f"{match.group(1)}:{match.group(2) or '00'} {match.group(3).upper()}", "%I:%M %p").strftime("%H:%M")
+        X_PM_24H = datetime.strptime(
+            f"{match.group(1)}:{match.group(2) or '00'}:{match.group(3) or '00'} {match.group(4).upper()}", "%I:%M:%S %p"
+        ).strftime("%H:%M:%S")
         print(f"✅ Scheduling {symbol} stock price email to {to_email} at {X_PM_24H} (24H format)")
 
-        # Get the current time in 24-hour format
-        current_time = datetime.now().strftime("%H:%M")
+        hour, minute, second = (int(part) for part in X_PM_24H.split(":"))
+        today_at = datetime.now().replace(hour=hour, minute=minute, second=second, microsecond=0)
 
-        # Schedule the email for daily execution
-        schedule.every().day.at(X_PM_24H).do(send_stock_email)
+        # Schedule the email for daily execution on the shared scheduler; the same
+        # symbol, recipient and time always map to one job
+        next_run = get_scheduler().add_daily(
+            f"stock:{symbol}:{to_email}:{X_PM_24H}",
+            "Root_functions:send_stock_email",
+            {"to_email": to_email, "symbol": symbol, "retries": retries, "wait_time": wait_time},
+            at=X_PM_24H,
+        )
         print(f"📅 Email scheduled for {X_PM_24H} daily.")
 
-        # If the input time matches the current time, send email ASAP
-        if X_PM_24H == current_time:
+        # The scheduler fires today's time itself while it is still ahead. Only when it
+        # passed within the last minute (so the first run is tomorrow) send it now
+        if next_run > today_at.timestamp() and datetime.now() - today_at < timedelta(minutes=1):
             print("⏳ Time matches current time! Sending email ASAP...")
-            time.sleep(1)  # Small delay to ensure scheduler thread starts
-            send_stock_email()  # Immediate execution
-
-        # Run the scheduler in a background thread
-        scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
-        scheduler_thread.start()
+            send_stock_email(to_email, symbol, retries, wait_time)  # Immediate execution
 
     except ValueError as e:
         print(f"❌ Error: {e}")
         return  # Exit function if format is invalid
 
-def run_scheduler():
-    """Run the scheduler in a separate thread to avoid blocking the main script."""
-    while True:
-        print(f"🔄 Checking schedule at {datetime.now().strftime('%H:%M:%S')}...")  # Debugging
-        schedule.run_pending()
-        time.sleep(60)  # Check every minute
+CALENDAR_MIMETYPE = "text/calendar; method=REQUEST"
 
-def add_calendar_invite(subject, body, to_email, event_start, event_end):
-    """Create a calendar invite and send it via email."""
-    # If event_start or event_end are strings, parse them into datetime objects
-    if isinstance(event_start, str):
+def _event_time(value, name):
+    """Return value as a timezone-aware datetime; strings must be 'YYYY-MM-DD HH:MM:SS' and naive times are UTC."""
+    if isinstance(value, str):
         try:
-            event_start = datetime.strptime(event_start, "%Y-%m-%d %H:%M:%S")
+            value = datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
         except ValueError:
-            raise ValueError("event_start must be in 'YYYY-MM-DD HH:MM:SS' format")
-    if isinstance(event_end, str):
-        try:
-            event_end = datetime.strptime(event_end, "%Y-%m-%d %H:%M:%S")
-        except ValueError:
-            raise ValueError("event_end must be in 'YYYY-MM-DD HH:MM:SS' format")
+            raise ValueError(f"{name} must be in 'YYYY-MM-DD HH:MM:SS' format")
+    if not isinstance(value, datetime):
+        raise ValueError(f"{name} must be a datetime object or a string in 'YYYY-MM-DD HH:MM:SS' format")
+    return pytz.utc.localize(value) if value.tzinfo is None else value
+
+def build_calendar(events, organizer=None):
+    """Render events into one VCALENDAR, entirely in memory.
 
-    # Ensure event_start and event_end are datetime objects
-    if not isinstance(event_start, datetime):
-        raise ValueError("event_start must be a datetime object or a string in 'YYYY-MM-DD HH:MM:SS' format")
-    if not isinstance(event_end, datetime):
-        raise ValueError("event_end must be a datetime object or a string in 'YYYY-MM-DD HH:MM:SS' format")
+    Args:
+        events (list): Dicts with ``subject``, ``body``, ``event_start``,
+            ``event_end`` and optionally ``to_email`` (added as attendee)
+        organizer (str, optional): Organizer e-mail address
 
-    # Add timezone information if not already present
-    if event_start.tzinfo is None:
-        event_start = pytz.utc.localize(event_start)
-    if event_end.tzinfo is None:
-        event_end = pytz.utc.localize(event_end)
+    Returns:
+        bytes: The iCalendar (.ics) content.
+    """
+    from icalendar import Calendar, Event
 
-    # Create the calendar and event
     cal = Calendar()
-    event = Event()
-    event.add('summary', subject)
-    event.add('dtstart', event_start)
-    event.add('dtend', event_end)
-    event.add('description', body)
-    cal.add_component(event)
-
-    # Save the .ics file
-    ics_file = 'invite.ics'
-    with open(ics_file, 'wb') as f:
-        f.write(cal.to_ical())
-    print(f"✅ Calendar invite saved to {ics_file}")
-
-    # Send the invite via email
-    send_email(subject, body, to_email)
-    print(f"✅ Calendar invite sent to {to_email}")
+    cal.add('prodid', '-//File Organizer//Calendar Invites//EN')
+    cal.add('version', '2.0')
+    cal.add('method', 'REQUEST')
+    stamp = datetime.now(pytz.utc)
+    for e in events:
+        event_start = _event_time(e["event_start"], "event_start")
+        event_end = _event_time(e["event_end"], "event_end")
+        event = Event()
+        # Stable UID, so re-sending the same invite updates the event instead of duplicating it
+        uid_source = f"{e['subject']}\0{event_start.isoformat()}\0{e.get('to_email', '')}"
+        event.add('uid', f"{hashlib.sha1(uid_source.encode()).hexdigest()}@file-organizer")
+        event.add('dtstamp', stamp)
+        event.add('summary', e["subject"])
+        event.add('dtstart', event_start)
+        event.add('dtend', event_end)
+        event.add('description', e["body"])
+        if organizer:
+            event.add('organizer', f"mailto:{organizer}")
+        if e.get("to_email"):
+            event.add('attendee', f"mailto:{e['to_email']}")
+        cal.add_component(event)
+    return cal.to_ical()
+
+def add_calendar_invite(subject, body, to_email, event_start, event_end):
+    """Create a calendar invite and send it via email.
+
+    Returns:
+        str: None if the invite was sent, otherwise the error message.
+    """
+    from_email = "ajaynadimpallikumar@gmail.com"
+    ics = build_calendar([{"subject": subject, "body": body, "to_email": to_email,
+                           "event_start": event_start, "event_end": event_end}], organizer=from_email)
+    error = send_email(subject, body, to_email, from_email, attachments=[("invite.ics", ics, CALENDAR_MIMETYPE)])
+    if error is None:
+        print(f"✅ Calendar invite sent to {to_email}")
+    return error
+
+def add_calendar_invites(events, combine=False, from_email="ajaynadimpallikumar@gmail.com"):
+    """Send many calendar invites in one bulk job over a single SMTP session.
+
+    Args:
+        events (list): Dicts with ``subject``, ``body``, ``to_email``,
+            ``event_start`` and ``event_end`` (as for add_calendar_invite)
+        combine (bool, optional): Send each recipient one email whose single
+            VCALENDAR holds all of their events, instead of one email and
+            attachment per event. Defaults to False.
+        from_email (str, optional): Sender and organizer address
+
+    Returns:
+        list: One entry per event, None if its invite was sent or the error message.
+    """
+    events = list(events)
+    groups = {}
+    for position, e in enumerate(events):
+        groups.setdefault(e["to_email"] if combine else position, []).append(position)
+
+    emails, errors = [], [None] * len(events)
+    for positions in groups.values():
+        group = [events[p] for p in positions]
+        try:
+            ics = build_calendar(group, organizer=from_email)
+        except ValueError as e:
+            for p in positions:
+                errors[p] = str(e)
+            continue
+        subject = group[0]["subject"] if len(group) == 1 else f"{len(group)} calendar invites"
+        body = "\n\n".join(e["body"] for e in group)
+        emails.append((positions, {"subject": subject, "body": body, "to_email": group[0]["to_email"],
+                                   "attachments": [("invite.ics", ics, CALENDAR_MIMETYPE)]}))
+
+    results = send_emails([email for _, email in emails], from_email=from_email) if emails else []
+    for (positions, email), error in zip(emails, results):
+        for p in positions:
+            errors[p] = error
+        if error is None:
+            print(f"✅ {len(positions)} calendar invite(s) sent to {email['to_email']}")
+    return errors
 
 # Example usage
 if __name__ == "__main__":
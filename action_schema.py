@@ -0,0 +1,201 @@
+"""Structured actions for to_do.txt tasks.
+
+The task analyzer replies with JSON actions, {"function": name, "arguments":
+{...}}, instead of free text. Each function's parameters are declared once in
+ACTION_SCHEMAS and compiled into per-field coercers, so a reply is validated and
+converted (e-mail addresses, datetimes, times of day, ticker symbols) in one
+pass. Fields that fail validation are reported by name, which lets the caller
+re-ask the model for just those fields instead of re-analyzing the task.
+"""
+import json
+import re
+from datetime import datetime
+
+import pytz
+
+# Bump when the reply format changes so cached replies in the old format are not reused
+ACTION_FORMAT = "json-v1"
+
+# Parameters of the functions execute_task() can run; ("type", default) marks optional ones
+ACTION_SCHEMAS = {
+    "remind_me": {"subject": "text", "body": "text", "to_email": "email"},
+    "send_email": {"subject": "text", "body": "text", "to_email": "email"},
+    "add_calendar_invite": {
+        "subject": "text",
+        "body": "text",
+        "to_email": "email",
+        "event_start": "datetime",
+        "event_end": "datetime",
+    },
+    "share_stock_price": {"to_email": "email", "time_str": ("time", "6:00 PM"), "symbol": ("symbol", "NVDA")},
+}
+
+TYPE_DESCRIPTIONS = {
+    "text": "non-empty string",
+    "email": "e-mail address",
+    "datetime": 'date and time, "YYYY-MM-DD HH:MM:SS" (UTC)',
+    "time": 'time of day, "H:MM AM/PM"',
+    "symbol": "stock ticker symbol, e.g. NVDA",
+}
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+SYMBOL_RE = re.compile(r"[A-Z][A-Z0-9.\-]{0,9}")
+TIME_12H_RE = re.compile(r"(\d{1,2})(?::(\d{2}))?(?::(\d{2}))?\s*([AP])\.?M\.?", re.IGNORECASE)
+TIME_24H_RE = re.compile(r"(\d{1,2}):(\d{2})(?::(\d{2}))?")
+DATETIME_FORMATS = ["%Y-%m-%d %I:%M %p", "%Y-%m-%d %I %p", "%Y-%m-%d"]
+
+def _coerce_text(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = str(value)
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError("expected a non-empty string")
+    return value.strip()
+
+def _coerce_email(value):
+    value = _coerce_text(value).removeprefix("mailto:")
+    if not EMAIL_RE.fullmatch(value):
+        raise ValueError(f"'{value}' is not an e-mail address")
+    return value
+
+def _coerce_datetime(value):
+    """Accept ISO 8601 (with or without seconds, 'T', offset or Z) and a few common spellings."""
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        text = _coerce_text(value)
+        try:
+            parsed = datetime.fromisoformat(text)
+        except ValueError:
+            for fmt in DATETIME_FORMATS:
+                try:
+                    parsed = datetime.strptime(text.upper(), fmt)
+                    break
+                except ValueError:
+                    continue
+            else:
+                raise ValueError(f"'{text}' is not a date and time like YYYY-MM-DD HH:MM:SS") from None
+    # Naive times are taken as UTC, as the calendar invite has always done
+    return parsed.replace(tzinfo=pytz.UTC) if parsed.tzinfo is None else parsed.astimezone(pytz.UTC)
+
+def _coerce_time(value):
+    """Normalize "6 PM", "6:30pm", "18:30" or "18:30:00" to "H:MM[:SS] AM/PM"."""
+    text = _coerce_text(value)
+    match = TIME_12H_RE.fullmatch(text)
+    if match:
+        hour, minute, second = int(match.group(1)), int(match.group(2) or 0), int(match.group(3) or 0)
+        suffix = match.group(4).upper() + "M"
+        if not 1 <= hour <= 12:
+            raise ValueError(f"'{text}' is not a valid time of day")
+    else:
+        match = TIME_24H_RE.fullmatch(text)
+        if not match:
+            raise ValueError(f"'{text}' is not a time of day like 6:00 PM")
+        hour, minute, second = int(match.group(1)), int(match.group(2)), int(match.group(3) or 0)
+        if hour > 23:
+            raise ValueError(f"'{text}' is not a valid time of day")
+        suffix = "PM" if hour >= 12 else "AM"
+        hour = hour % 12 or 12
+    if minute > 59 or second > 59:
+        raise ValueError(f"'{text}' is not a valid time of day")
+    return f"{hour}:{minute:02d}:{second:02d} {suffix}" if second else f"{hour}:{minute:02d} {suffix}"
+
+def _coerce_symbol(value):
+    value = _coerce_text(value).upper().lstrip("$")
+    if not SYMBOL_RE.fullmatch(value):
+        raise ValueError(f"'{value}' is not a ticker symbol")
+    return value
+
+COERCERS = {
+    "text": _coerce_text,
+    "email": _coerce_email,
+    "datetime": _coerce_datetime,
+    "time": _coerce_time,
+    "symbol": _coerce_symbol,
+}
+
+_MISSING = object()
+
+def compile_schema(parameters):
+    """Compile {name: "type" | ("type", default)} into a list of (name, type, coercer, default) fields."""
+    fields = []
+    for name, spec in parameters.items():
+        type_name, default = spec if isinstance(spec, tuple) else (spec, _MISSING)
+        fields.append((name, type_name, COERCERS[type_name], default))
+    return fields
+
+COMPILED_SCHEMAS = {name: compile_schema(parameters) for name, parameters in ACTION_SCHEMAS.items()}
+
+def validate_action(function_name, arguments):
+    """Validate and coerce the arguments of an action.
+
+    Returns:
+        tuple: (values, errors). values maps each parameter to its coerced value;
+        errors maps each invalid or missing parameter to a message (empty when the
+        action is valid). An unknown function is reported under "function".
+    """
+    fields = COMPILED_SCHEMAS.get(function_name)
+    if fields is None:
+        return {}, {"function": f"'{function_name}' is not one of: {', '.join(ACTION_SCHEMAS)}"}
+    arguments = arguments if isinstance(arguments, dict) else {}
+    values, errors = {}, {}
+    for name, type_name, coerce, default in fields:
+        value = arguments.get(name)
+        if value is None or value == "":
+            if default is _MISSING:
+                errors[name] = f"missing ({TYPE_DESCRIPTIONS[type_name]})"
+            else:
+                values[name] = default
+            continue
+        try:
+            values[name] = coerce(value)
+        except ValueError as e:
+            errors[name] = str(e)
+    if "event_end" in values and "event_start" in values and values["event_end"] <= values["event_start"]:
+        errors["event_end"] = "must be after event_start"
+    return values, errors
+
+def describe_schemas():
+    """Render the accepted functions and their argument types for prompts."""
+    lines = []
+    for function_name, fields in COMPILED_SCHEMAS.items():
+        arguments = ", ".join(
+            f'"{name}": {TYPE_DESCRIPTIONS[type_name]}' + ("" if default is _MISSING else f" (default {default})")
+            for name, type_name, _, default in fields
+        )
+        lines.append(f"- {function_name}: {{{arguments}}}")
+    return "\n".join(lines)
+
+def parse_json_reply(text):
+    """Decode a JSON reply, tolerating a surrounding ```json code fence. Returns None if it is not JSON."""
+    text = text.strip()
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+def parse_action(text):
+    """Return {"function", "arguments"} from a single-action reply, or None when malformed."""
+    data = parse_json_reply(text)
+    if isinstance(data, dict) and isinstance(data.get("function"), str):
+        return {"function": data["function"].strip(), "arguments": data.get("arguments") or {}}
+    return None
+
+def parse_batch_actions(text, task_count):
+    """Return {task number (1-based): action} from a batched reply; malformed entries are absent."""
+    data = parse_json_reply(text)
+    entries = data.get("tasks") if isinstance(data, dict) else data
+    actions = {}
+    for position, entry in enumerate(entries if isinstance(entries, list) else [], 1):
+        if not isinstance(entry, dict) or not isinstance(entry.get("function"), str):
+            continue
+        number = entry.get("task", position)
+        if isinstance(number, int) and 1 <= number <= task_count:
+            actions[number] = {"function": entry["function"].strip(), "arguments": entry.get("arguments") or {}}
+    return actions
+
+def serialize_action(action):
+    """Return the canonical JSON text of an action (as cached)."""
+    return json.dumps({"function": action["function"], "arguments": action["arguments"]}, sort_keys=True)
@@ -0,0 +1,323 @@
+"""Benchmarks for the organizer, the compressors and task execution.
+
+Each stage runs in a fresh subprocess against a synthetic corpus, with the
+LLM, SMTP and ConvertAPI replaced by the local fakes in fakes.py, and reports
+throughput, latency percentiles (from the metrics registry) and peak RSS.
+
+    python benchmark.py                                  # default sizes
+    python benchmark.py --files 1000 100000 1000000      # organizer scaling
+    python benchmark.py --save-baseline bench.json       # record a baseline
+    python benchmark.py --baseline bench.json            # fail on regressions
+    python benchmark.py --stages startup                 # cold-start import budget check
+
+Baselines are machine specific, so they are not committed.
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Organizer corpus: extensions of every category plus some that stay in place
+CORPUS_EXTENSIONS = [".pdf", ".jpg", ".png", ".gif", ".py", ".js", ".html", ".docx", ".txt", ".csv", ".xlsx", ".zip", ".bin"]
+
+STAGES = ["startup", "organize", "images", "pdfs", "pdfs_local", "tasks"]
+
+# Backends the organize path must not import; each is loaded only when its task runs
+HEAVY_MODULES = ["google.generativeai", "google.cloud.secretmanager", "yfinance", "pandas", "PIL", "PyPDF2",
+                 "convertapi", "icalendar", "schedule"]
+
+# Cold start of an organize-only headless run, timed in a bare interpreter
+STARTUP_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from serve_gemini import policy_approver, run_batch
+imported = time.perf_counter() - started
+run_batch([sys.argv[1]], policy_approver({"categorize_and_move_files"}), workers=1)
+total = time.perf_counter() - started
+heavy = [m for m in %r if m in sys.modules]
+sys.stderr.write(json.dumps({"import_seconds": imported, "seconds": total, "heavy_modules": heavy}) + "\\n")
+""" % (HEAVY_MODULES,)
+
+def make_file_corpus(root, count, seed=0):
+    """Create `count` small files with mixed extensions directly in root."""
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    for i in range(count):
+        with open(os.path.join(root, f"file_{i:07d}{rng.choice(CORPUS_EXTENSIONS)}"), "wb") as f:
+            f.write(b"x" * rng.randint(0, 512))
+
+def make_image_corpus(root, count, size=(1600, 1200), seed=0):
+    """Create `count` photo-like JPEG, PNG and animated GIF images in root."""
+    from PIL import Image, ImageDraw, ImageFilter
+
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    for i in range(count):
+        img = Image.effect_noise(size, 40).convert("RGB")
+        draw = ImageDraw.Draw(img)
+        for _ in range(20):
+            x, y = rng.randrange(size[0]), rng.randrange(size[1])
+            draw.ellipse((x, y, x + rng.randint(50, 400), y + rng.randint(50, 400)),
+                         fill=tuple(rng.randrange(256) for _ in range(3)))
+        img = img.filter(ImageFilter.GaussianBlur(2))
+        kind = i % 4
+        if kind < 2:
+            img.save(os.path.join(root, f"photo_{i:05d}.jpg"), quality=95)
+        elif kind == 2:
+            img.save(os.path.join(root, f"chart_{i:05d}.png"))
+        else:
+            small = img.resize((size[0] // 4, size[1] // 4))
+            frames = [small.rotate(angle) for angle in range(0, 360, 45)]
+            frames[0].save(os.path.join(root, f"anim_{i:05d}.gif"), save_all=True, append_images=frames[1:],
+                           duration=80, loop=0)
+
+def make_pdf_corpus(root, count, pages=4, seed=0):
+    """Create `count` scanned-style PDFs, each with `pages` full-page images."""
+    from PIL import Image
+
+    os.makedirs(root, exist_ok=True)
+    for i in range(count):
+        images = [Image.effect_noise((1240, 1754), 30 + page).convert("RGB") for page in range(pages)]
+        images[0].save(os.path.join(root, f"scan_{i:05d}.pdf"), save_all=True, append_images=images[1:],
+                       resolution=150)
+
+def make_tasks(count, seed=0):
+    """Return `count` to_do.txt lines: reminders, emails and calendar invites."""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        kind = rng.randrange(3)
+        if kind == 0:
+            lines.append(f'Remind me to "submit report {i}" via email. My email is user{i}@example.com')
+        elif kind == 1:
+            lines.append(f'Send an email to user{i}@example.com saying "Status update {i}"')
+        else:
+            day = 1 + i % 28
+            lines.append(f'Add a calendar invite for "Sync {i}" on 2030-01-{day:02d} 10:00 for 1 hour to user{i}@example.com')
+    return lines
+
+def fake_llm_reply(prompt):
+    """Answer single and batched analysis prompts the way the real model would, using the rule matcher."""
+    from intent_rules import match_task
+
+    if "Tasks:" in prompt:
+        tasks = []
+        for line in prompt.split("Tasks:", 1)[1].splitlines():
+            number, _, task = line.strip().partition(". ")
+            if number.isdigit():
+                tasks.append(task)
+    else:
+        tasks = [prompt.split('For the task: "', 1)[1].rsplit('", determine', 1)[0]]
+    entries = []
+    for number, task in enumerate(tasks, 1):
+        match = match_task(task) or ("send_email", {}, 0)
+        entries.append({"task": number, "function": match[0], "arguments": match[1]})
+    return json.dumps({"tasks": entries} if "Tasks:" in prompt else entries[0])
+
+def _stage_startup(workdir, size):
+    make_file_corpus(workdir, size)
+    process = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, workdir], cwd=HERE, check=True,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    timings = json.loads(process.stderr.strip().splitlines()[-1])
+    return size, timings.pop("seconds"), None, timings
+
+def _stage_organize(workdir, size):
+    from Root_functions import categorize_and_move_files
+
+    make_file_corpus(workdir, size)
+    started = time.perf_counter()
+    categorize_and_move_files(workdir)
+    return size, time.perf_counter() - started, "move"
+
+def _stage_images(workdir, size):
+    from Root_functions import compress_images_in_folder
+
+    make_image_corpus(workdir, size)
+    started = time.perf_counter()
+    compress_images_in_folder(workdir)
+    return size, time.perf_counter() - started, "image_compress"
+
+def _stage_pdfs(workdir, size):
+    from fakes import FakeConvertAPIServer
+    from Root_functions import compress_pdfs_in_folder
+
+    make_pdf_corpus(workdir, size)
+    # A realistic round trip; the fake answers with the input unchanged
+    with FakeConvertAPIServer(latency=0.2, compress=lambda data: data) as server:
+        os.environ.update(CONVERTAPI_SECRET="benchmark", CONVERTAPI_BASE_URI=server.base_uri)
+        started = time.perf_counter()
+        compress_pdfs_in_folder(workdir, backend="convertapi")
+        return size, time.perf_counter() - started, "pdf_compress"
+
+def _stage_pdfs_local(workdir, size):
+    from Root_functions import compress_pdfs_in_folder
+
+    make_pdf_corpus(workdir, size)
+    started = time.perf_counter()
+    compress_pdfs_in_folder(workdir, backend="local")
+    return size, time.perf_counter() - started, "pdf_compress"
+
+def _stage_tasks(workdir, size):
+    from fakes import FakeModel, FakeSMTPServer
+    from function_catalog import load_function_catalog
+    from serve_gemini import analyze_tasks_with_llm
+
+    tasks = make_tasks(size)
+    model = FakeModel(fake_llm_reply, latency=0.5)
+    with FakeSMTPServer() as server:
+        os.environ.update(SMTP_HOST=server.host, SMTP_PORT=str(server.port), SMTP_STARTTLS="0")
+        started = time.perf_counter()
+        # A threshold above 1 sends every task through the (fake) LLM, schema validation and execute_task
+        analyze_tasks_with_llm(model, tasks, load_function_catalog()["text"], rule_threshold=1.01,
+                               approve=lambda function_name, description: True)
+        return size, time.perf_counter() - started, "smtp_send"
+
+def _peak_rss_mb():
+    """Peak resident set size of this process and its finished children, in MiB (Linux reports KiB)."""
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak / 1024 if sys.platform != "darwin" else peak / (1024 * 1024)
+
+def run_stage(stage, size, workdir):
+    """Run one stage in this process and return its result record (called in the stage subprocess)."""
+    from metrics import METRICS
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        items, seconds, latency_stage, *extra = globals()[f"_stage_{stage}"](workdir, size)
+    summary = METRICS.summary()["stages"]
+    latency = summary.get(latency_stage, {})
+    return dict(extra[0] if extra else {}, **{
+        "stage": stage,
+        "size": size,
+        "seconds": seconds,
+        "throughput": items / seconds if seconds else None,
+        "p50_ms": latency["p50_seconds"] * 1000 if latency.get("p50_seconds") is not None else None,
+        "p95_ms": latency["p95_seconds"] * 1000 if latency.get("p95_seconds") is not None else None,
+        "p99_ms": latency["p99_seconds"] * 1000 if latency.get("p99_seconds") is not None else None,
+        "errors": sum(s["errors"] for s in summary.values()),
+        "peak_rss_mb": _peak_rss_mb(),
+        "metrics": summary,
+    })
+
+def check_startup(results, budget):
+    """Return messages for startup runs over the time budget or importing heavy backends."""
+    problems = []
+    for r in results:
+        if r["stage"] != "startup":
+            continue
+        if r["seconds"] > budget:
+            problems.append(f"organize cold start took {r['seconds']:.2f}s (budget {budget:.2f}s, "
+                            f"imports {r['import_seconds']:.2f}s)")
+        if r["heavy_modules"]:
+            problems.append(f"organize path imported {', '.join(r['heavy_modules'])}")
+    return problems
+
+def run_isolated(stage, size, keep=False):
+    """Run a stage in a fresh interpreter so peak RSS and caches are per stage."""
+    workdir = tempfile.mkdtemp(prefix=f"bench_{stage}_")
+    result_path = os.path.join(workdir, ".result.json")
+    try:
+        subprocess.run([sys.executable, os.path.abspath(__file__), "--run-stage", stage, str(size), workdir,
+                        result_path], check=True, cwd=HERE)
+        with open(result_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        if not keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression messages: throughput, p95 or peak RSS worse than baseline by more than tolerance."""
+    previous = {(r["stage"], r["size"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get((result["stage"], result["size"]))
+        if old is None:
+            continue
+        label = f"{result['stage']}[{result['size']}]"
+        if old["throughput"] and result["throughput"] < old["throughput"] * (1 - tolerance):
+            regressions.append(f"{label}: throughput {result['throughput']:.1f}/s vs {old['throughput']:.1f}/s")
+        if old["p95_ms"] and result["p95_ms"] and result["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{label}: p95 {result['p95_ms']:.2f}ms vs {old['p95_ms']:.2f}ms")
+        if result["peak_rss_mb"] > old["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{label}: peak RSS {result['peak_rss_mb']:.0f}MiB vs {old['peak_rss_mb']:.0f}MiB")
+    return regressions
+
+def print_table(results):
+    def fmt(value, width, digits=2):
+        return f"{value:>{width}.{digits}f}" if value is not None else f"{'-':>{width}}"
+
+    print(f"{'stage':<12}{'size':>9}{'seconds':>10}{'items/s':>11}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'RSS MiB':>9}{'errors':>8}")
+    for r in results:
+        print(f"{r['stage']:<12}{r['size']:>9}{r['seconds']:>10.2f}{fmt(r['throughput'], 11, 1)}"
+              f"{fmt(r['p50_ms'], 10)}{fmt(r['p95_ms'], 10)}{fmt(r['p99_ms'], 10)}"
+              f"{r['peak_rss_mb']:>9.0f}{r['errors']:>8}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the organizer, compressors and task execution.")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES, help="Stages to run (default: all)")
+    parser.add_argument("--files", type=int, nargs="+", default=[1000, 100000],
+                        help="Organizer corpus sizes (default: 1000 100000; add 1000000 for the large run)")
+    parser.add_argument("--images", type=int, nargs="+", default=[50], help="Image corpus sizes (default: 50)")
+    parser.add_argument("--pdfs", type=int, nargs="+", default=[20], help="PDF corpus sizes (default: 20)")
+    parser.add_argument("--tasks", type=int, nargs="+", default=[100], help="to_do.txt line counts (default: 100)")
+    parser.add_argument("--startup-files", type=int, nargs="+", default=[1000],
+                        help="Files in the cold-start organize run (default: 1000)")
+    parser.add_argument("--startup-budget", type=float, default=1.0,
+                        help="Maximum seconds for the cold-start organize run, imports included (default: 1.0)")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--save-baseline", help="Write the results to this baseline file")
+    parser.add_argument("--baseline", help="Compare against this baseline and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown (default: 0.2)")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated corpora")
+    parser.add_argument("--run-stage", nargs=4, metavar=("STAGE", "SIZE", "WORKDIR", "RESULT"), help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.run_stage:
+        stage, size, workdir, result_path = args.run_stage
+        sys.path.insert(0, HERE)
+        result = run_stage(stage, int(size), workdir)
+        with open(result_path, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return 0
+
+    sizes = {"startup": args.startup_files, "organize": args.files, "images": args.images, "pdfs": args.pdfs, "pdfs_local": args.pdfs,
+             "tasks": args.tasks}
+    results = []
+    for stage in args.stages:
+        for size in sizes[stage]:
+            print(f"⏱  {stage} ({size})...")
+            results.append(run_isolated(stage, size, keep=args.keep))
+    print()
+    print_table(results)
+    failed = False
+    for message in check_startup(results, args.startup_budget):
+        print(f"✗ Startup: {message}")
+        failed = True
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Results written to {path}")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for message in regressions:
+            print(f"✗ Regression: {message}")
+        if regressions:
+            return 1
+        print("✓ No regressions against the baseline")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Duplicate detection for the organizer's category folders.
+
+Candidates are narrowed in three rounds so that most files are never read in
+full: files are grouped by size (a stat only), same-size files by a hash of
+their first and last PARTIAL_BYTES, and only files that still collide are
+hashed completely, through mmap where possible. Files that already share an
+inode (earlier hardlinks) count as one.
+"""
+import hashlib
+import mmap
+import os
+
+PARTIAL_BYTES = 64 * 1024
+
+DEDUP_POLICIES = ("hardlink", "delete")
+
+def partial_digest(path, size, block=PARTIAL_BYTES):
+    """Hash the first and last `block` bytes of a file (the whole file when it is small)."""
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        digest.update(f.read(block))
+        if size > 2 * block:
+            f.seek(-block, os.SEEK_END)
+        digest.update(f.read(block))
+    return digest.hexdigest()
+
+def full_digest(path, chunk_size=1024 * 1024):
+    """Hash a whole file, mapping it into memory instead of copying it through read() buffers."""
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        except (ValueError, OSError):
+            # Empty files and file systems without mmap support
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+def _regroup(groups, key):
+    """Split each group by key(path, size), keeping only sub-groups with more than one member."""
+    result = []
+    for group in groups:
+        buckets = {}
+        for path, size in group:
+            try:
+                buckets.setdefault(key(path, size), []).append((path, size))
+            except OSError as e:
+                print(f"✗ Cannot read {path}: {str(e)}")
+        result.extend(bucket for bucket in buckets.values() if len(bucket) > 1)
+    return result
+
+def find_duplicates(paths, min_size=1):
+    """Group files with identical content.
+
+    Args:
+        paths (iterable): File paths to compare
+        min_size (int, optional): Ignore files smaller than this. Defaults to 1 (skip empty files).
+
+    Returns:
+        list[list[str]]: Groups of two or more paths with the same content, each
+        sorted, one path per inode.
+    """
+    by_size = {}
+    seen_inodes = set()
+    for path in paths:
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except OSError:
+            continue
+        if st.st_size < min_size or (st.st_dev, st.st_ino) in seen_inodes:
+            continue
+        seen_inodes.add((st.st_dev, st.st_ino))
+        by_size.setdefault(st.st_size, []).append((path, st.st_size))
+
+    groups = [group for group in by_size.values() if len(group) > 1]
+    groups = _regroup(groups, partial_digest)
+    # The partial hash already covered files of up to two blocks
+    small = [group for group in groups if group[0][1] <= 2 * PARTIAL_BYTES]
+    large = _regroup([group for group in groups if group[0][1] > 2 * PARTIAL_BYTES],
+                     lambda path, size: full_digest(path))
+    return [sorted(path for path, _ in group) for group in small + large]
+
+def replace_with_link(target, path):
+    """Atomically replace path with a hardlink to target."""
+    tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.dedup")
+    os.link(target, tmp_path)
+    try:
+        os.replace(tmp_path, path)
+    finally:
+        # Still there if replace failed, or was a no-op because path already is target's inode
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+
+def dedup_files(directory, new_paths, policy):
+    """Resolve duplicates among the files directly in directory that involve new_paths.
+
+    Existing files are never touched: in each duplicate group the first existing
+    file (or, if all are new, the first new one in sorted order) is kept, and the
+    other new files are replaced by hardlinks to it or deleted, per policy.
+
+    Args:
+        directory (str): Folder to deduplicate (e.g. a category folder)
+        new_paths (iterable): Files that just arrived in directory
+        policy (str): "hardlink" or "delete"
+
+    Returns:
+        dict: ``duplicates`` (files linked or deleted), ``bytes_reclaimed`` and
+        ``errors`` (list of ``{"file", "error"}``).
+    """
+    if policy not in DEDUP_POLICIES:
+        raise ValueError(f"Unknown dedup policy '{policy}'. Choose from: {', '.join(DEDUP_POLICIES)}")
+    new_paths = set(new_paths)
+    result = {"duplicates": 0, "bytes_reclaimed": 0, "errors": []}
+    if not new_paths:
+        return result
+    with os.scandir(directory) as entries:
+        paths = [entry.path for entry in entries
+                 if not entry.name.startswith(".") and entry.is_file(follow_symlinks=False)]
+
+    for group in find_duplicates(paths):
+        arrivals = [path for path in group if path in new_paths]
+        if not arrivals:
+            continue
+        existing = [path for path in group if path not in new_paths]
+        keep = existing[0] if existing else arrivals[0]
+        for path in arrivals:
+            if path == keep:
+                continue
+            try:
+                size = os.path.getsize(path)
+                if policy == "hardlink":
+                    replace_with_link(keep, path)
+                else:
+                    os.remove(path)
+                result["duplicates"] += 1
+                result["bytes_reclaimed"] += size
+            except OSError as e:
+                result["errors"].append({"file": os.path.basename(path), "error": str(e)})
+    return result
@@ -0,0 +1,312 @@
+"""Local stand-ins for the remote services used by Root_functions.
+
+These let the pipelines run against loopback servers and in-memory objects
+instead of the real services, for development, tests and benchmarks.
+"""
+import base64
+import json
+import re
+import socketserver
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class FakeResponse:
+    """Minimal stand-in for a genai GenerateContentResponse."""
+
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    """Stand-in for genai.GenerativeModel that answers from a callable instead of the network.
+
+    Args:
+        respond (callable or str): prompt -> reply text, or a fixed reply
+        model_name (str, optional): Reported model name (used in cache keys)
+        latency (float, optional): Seconds to sleep per call
+
+    Every prompt is recorded in `prompts`.
+    """
+
+    def __init__(self, respond, model_name="models/fake", latency=0.0):
+        self.respond = respond if callable(respond) else (lambda prompt: respond)
+        self.model_name = model_name
+        self.latency = latency
+        self.prompts = []
+
+    def generate_content(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        if self.latency:
+            time.sleep(self.latency)
+        return FakeResponse(self.respond(prompt))
+
+class FakeQuoteProvider:
+    """Quote provider returning fixed prices, for market_data.set_quote_provider().
+
+    Args:
+        prices (dict): Symbol -> price
+        fail_first (int, optional): Raise a rate-limit error on the first N fetches
+        latency (float, optional): Seconds to sleep per fetch
+
+    Every fetch is recorded in `calls` as the list of symbols requested.
+    """
+
+    def __init__(self, prices, fail_first=0, latency=0.0):
+        self.prices = dict(prices)
+        self.fail_first = fail_first
+        self.latency = latency
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def fetch(self, symbols):
+        with self._lock:
+            self.calls.append(list(symbols))
+            failing = len(self.calls) <= self.fail_first
+        if self.latency:
+            time.sleep(self.latency)
+        if failing:
+            raise RuntimeError("Too Many Requests. Rate limited. Try after a while.")
+        return {symbol: self.prices[symbol] for symbol in symbols if symbol in self.prices}
+
+class _ConvertAPIHandler(BaseHTTPRequestHandler):
+    """Request handler emulating the ConvertAPI upload / convert / download endpoints."""
+
+    def log_message(self, format, *args):
+        pass  # Keep test and benchmark output quiet
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _store(self, data):
+        file_id = uuid.uuid4().hex
+        with self.server.lock:
+            self.server.files[file_id] = data
+        return file_id
+
+    def do_POST(self):
+        fake = self.server.fake
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        path = self.path.split("?", 1)[0].strip("/")
+
+        if path == "upload":
+            file_id = self._store(body)
+            return self._send_json(200, {"FileId": file_id, "FileName": "upload.pdf", "FileExt": "pdf"})
+
+        if not path.startswith("convert/"):
+            return self._send_json(404, {"Message": "Not found"})
+
+        status = fake._admit()
+        if status is not None:
+            return self._send_json(status, {"Message": "Too Many Requests" if status == 429 else "Service Unavailable"})
+
+        # The file either arrives as a previously uploaded FileId or inline in the body
+        with self.server.lock:
+            data = next((self.server.files[i] for i in self.server.files if i.encode() in body), None)
+        if data is None:
+            match = re.search(rb"%PDF.*%%EOF", body, re.S)
+            data = match.group(0) if match else body
+        if fake.latency:
+            time.sleep(fake.latency)
+        output = fake.compress(data)
+        file_id = self._store(output)
+        host, port = self.server.server_address[:2]
+        self._send_json(200, {
+            "ConversionCost": 1,
+            "Files": [{
+                "FileName": "compressed.pdf",
+                "FileExt": "pdf",
+                "FileSize": len(output),
+                "FileId": file_id,
+                "Url": f"http://{host}:{port}/d/{file_id}",
+                "FileData": base64.b64encode(output).decode(),
+            }],
+        })
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0].strip("/")
+        with self.server.lock:
+            data = self.server.files.get(path[2:]) if path.startswith("d/") else None
+        if data is None:
+            return self._send_json(404, {"Message": "Not found"})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+class FakeConvertAPIServer:
+    """Loopback HTTP server standing in for ConvertAPI.
+
+    Point the client at it with CONVERTAPI_BASE_URI=fake.base_uri (any non-empty
+    CONVERTAPI_SECRET works). Every convert call is recorded in `calls`.
+
+    Args:
+        max_rps (float, optional): Answer 429 when more convert calls than this
+            arrive within one second
+        fail_first (int, optional): Answer 503 to the first N convert calls
+        latency (float, optional): Seconds to sleep per conversion
+        compress (callable, optional): bytes -> bytes "compression"; defaults to
+            collapsing runs of whitespace
+    """
+
+    def __init__(self, max_rps=None, fail_first=0, latency=0.0, compress=None):
+        self.max_rps = max_rps
+        self.fail_first = fail_first
+        self.latency = latency
+        self.compress = compress or (lambda data: re.sub(rb"\s+", b" ", data))
+        self.calls = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _ConvertAPIHandler)
+        self._server.fake = self
+        self._server.files = {}
+        self._server.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_uri(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _admit(self):
+        """Record a convert call and return an error status if it should be rejected."""
+        now = time.monotonic()
+        with self._lock:
+            self.calls.append(now)
+            if len(self.calls) <= self.fail_first:
+                return 503
+            if self.max_rps is not None:
+                recent = sum(1 for t in self.calls if now - t < 1.0)
+                if recent > self.max_rps:
+                    return 429
+        return None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP dialogue: EHLO/HELO, AUTH, MAIL, RCPT, DATA, RSET, NOOP and QUIT."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        fake = self.server.fake
+        with fake._lock:
+            fake.connections += 1
+        sent_here = 0
+        mail_from, rcpts = None, []
+        self.reply("220 fake-smtp ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self.wfile.write(b"250-fake-smtp\r\n250 AUTH PLAIN LOGIN\r\n")
+            elif verb == "HELO":
+                self.reply("250 fake-smtp")
+            elif verb == "AUTH":
+                parts = command.split()
+                if len(parts) == 2 and parts[1].upper() == "LOGIN":
+                    for prompt in ("334 VXNlcm5hbWU6", "334 UGFzc3dvcmQ6"):
+                        self.reply(prompt)
+                        self.rfile.readline()
+                elif len(parts) == 2:
+                    self.reply("334 ")
+                    self.rfile.readline()
+                self.reply("235 Authentication successful")
+            elif verb == "MAIL":
+                mail_from, rcpts = command.split(":", 1)[1].strip(), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                rcpt = command.split(":", 1)[1].strip().strip("<>")
+                if rcpt in fake.refuse:
+                    self.reply("550 No such user")
+                else:
+                    rcpts.append(rcpt)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                for data_line in iter(self.rfile.readline, b""):
+                    if data_line in (b".\r\n", b".\n"):
+                        break
+                    data.append(data_line)
+                with fake._lock:
+                    fake.messages.append({"from": mail_from, "to": rcpts, "data": b"".join(data)})
+                self.reply("250 OK queued")
+                sent_here += 1
+                if fake.drop_after and sent_here >= fake.drop_after:
+                    return  # Simulate the server hanging up on a long session
+            elif verb in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+class FakeSMTPServer:
+    """Loopback SMTP server standing in for smtp.gmail.com.
+
+    Point send_email at it with SMTP_HOST=127.0.0.1, SMTP_PORT=fake.port and
+    SMTP_STARTTLS=0. Accepted messages are recorded in `messages` and the number
+    of TCP sessions in `connections`.
+
+    Args:
+        refuse (iterable, optional): Recipient addresses to reject with 550
+        drop_after (int, optional): Close each session after this many messages
+    """
+
+    def __init__(self, refuse=(), drop_after=None):
+        self.refuse = set(refuse)
+        self.drop_after = drop_after
+        self.messages = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPHandler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._thread = None
+
+    @property
+    def host(self):
+        return self._server.server_address[0]
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,96 @@
+import os
+import sqlite3
+import hashlib
+import threading
+import time
+
+INDEX_FILENAME = ".file_index.db"
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file, read in fixed-size chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class FileIndex:
+    """On-disk SQLite index of processed files.
+
+    Each row maps a path, size and mtime to the file's content hash and the
+    last action taken on it, so later runs only touch new or changed files.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                action TEXT NOT NULL,
+                updated REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS files_size_action ON files (size, action)")
+        self._conn.commit()
+
+    def needs_processing(self, path, action):
+        """Return False if path already went through action and has not changed since.
+
+        Size and mtime are compared first; the content hash is only computed when
+        they differ from the recorded values or the path is unknown but another
+        file of the same size went through the same action.
+        """
+        st = os.stat(path)
+        path = os.path.abspath(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, hash, action FROM files WHERE path = ?", (path,)
+            ).fetchone()
+            if row and row[3] == action and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+                return False
+            candidates = {
+                h for (h,) in self._conn.execute(
+                    "SELECT hash FROM files WHERE size = ? AND action = ?", (st.st_size, action)
+                )
+            }
+        if not candidates:
+            return True
+        digest = file_digest(path)
+        if digest not in candidates:
+            return True
+        # Same content as a file we already processed (touched, copied or renamed)
+        self.record(path, action, digest)
+        return False
+
+    def record(self, path, action, digest=None):
+        """Record that action was applied to path, hashing the file if no digest is given."""
+        st = os.stat(path)
+        digest = digest or file_digest(path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, hash, action, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(path), st.st_size, st.st_mtime_ns, digest, action, time.time()),
+            )
+            self._conn.commit()
+
+    def forget(self, path):
+        """Drop path from the index."""
+        with self._lock:
+            self._conn.execute("DELETE FROM files WHERE path = ?", (os.path.abspath(path),))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
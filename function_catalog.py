@@ -0,0 +1,64 @@
+import ast
+import hashlib
+import json
+import os
+
+ROOT_FUNCTIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Root_functions.py")
+CATALOG_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".function_catalog.json")
+
+def _task_function_names(tree):
+    """Return the names listed in the module-level TASK_FUNCTIONS assignment."""
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "TASK_FUNCTIONS" for t in node.targets):
+            return list(ast.literal_eval(node.value))
+    raise ValueError("TASK_FUNCTIONS is not defined")
+
+def build_function_catalog(source):
+    """Build the catalog of task functions from module source, without importing it.
+
+    Returns:
+        dict: ``functions`` (list of ``{"name", "signature", "doc"}``), ``text``
+        (the catalog rendered for prompts) and ``hash`` (SHA-256 of ``text``).
+    """
+    tree = ast.parse(source)
+    names = _task_function_names(tree)
+    definitions = {node.name: node for node in tree.body if isinstance(node, ast.FunctionDef)}
+    functions = []
+    for name in names:
+        node = definitions[name]
+        functions.append({
+            "name": name,
+            "signature": f"{name}({ast.unparse(node.args)})",
+            "doc": ast.get_docstring(node) or "",
+        })
+    text = "\n\n".join(
+        f"def {f['signature']}:\n" + "\n".join(f"    {line}".rstrip() for line in f['doc'].splitlines())
+        for f in functions
+    )
+    return {"functions": functions, "text": text, "hash": hashlib.sha256(text.encode()).hexdigest()}
+
+def load_function_catalog(source_path=ROOT_FUNCTIONS_PATH, cache_path=CATALOG_CACHE_PATH):
+    """Return the task function catalog, rebuilding the on-disk cache when the source changes.
+
+    The cache is keyed by the SHA-256 of the source file, so the catalog always
+    matches the code that will actually run.
+    """
+    with open(source_path, "rb") as f:
+        source = f.read()
+    source_hash = hashlib.sha256(source).hexdigest()
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("source_hash") == source_hash:
+            return cached
+    except (OSError, ValueError):
+        pass
+
+    catalog = build_function_catalog(source.decode("utf-8"))
+    catalog["source_hash"] = source_hash
+    try:
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump(catalog, f, indent=2)
+    except OSError as e:
+        print(f"Could not write function catalog cache: {e}")
+    return catalog
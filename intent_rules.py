@@ -0,0 +1,198 @@
+"""Deterministic task matcher used before falling back to the LLM.
+
+match_task() recognizes the common todo phrasings for the task functions in
+Root_functions.py and extracts their arguments with regular expressions. It
+reports a confidence, and callers only consult the LLM below a threshold.
+"""
+import re
+from datetime import timedelta, datetime
+
+from action_schema import serialize_action
+
+# Confidence at or above which a rule match is used without asking the LLM
+DEFAULT_THRESHOLD = 0.8
+
+# The organizer's built-in tasks always map to the same function
+BUILTIN_TASKS = {
+    "organize files into appropriate category folders": "categorize_and_move_files",
+    "compress pdf files": "compress_pdfs_in_folder",
+    "compress image files": "compress_images_in_folder",
+}
+
+# Company names people write instead of ticker symbols
+COMPANY_SYMBOLS = {
+    "nvidia": "NVDA",
+    "apple": "AAPL",
+    "microsoft": "MSFT",
+    "google": "GOOGL",
+    "alphabet": "GOOGL",
+    "amazon": "AMZN",
+    "tesla": "TSLA",
+    "meta": "META",
+}
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+QUOTED_RE = re.compile(r"[\"“”]([^\"“”]{3,})[\"“”]")
+TIME_RE = re.compile(r"\b(\d{1,2}(?::\d{2})?\s?(?:AM|PM))\b", re.IGNORECASE)
+DATETIME_RE = re.compile(r"\b(\d{4}-\d{2}-\d{2}[ T]\d{1,2}:\d{2}(?::\d{2})?)\b")
+DURATION_RE = re.compile(r"\bfor\s+(\d+(?:\.\d+)?)\s*(hours?|hrs?|minutes?|mins?)\b", re.IGNORECASE)
+SYMBOL_RE = re.compile(r"\b([A-Z]{2,5})\b")
+CASHTAG_RE = re.compile(r"\$([A-Za-z]{1,5})\b")
+
+# All-caps words that show up in todo lines but are not the ticker being asked about
+NOT_SYMBOLS = {
+    "AM", "PM", "ASAP", "EOD", "EOW", "FYI", "ETA", "TODO", "NOTE", "URGENT", "PLEASE", "OK",
+    "ME", "MY", "THE", "AND", "FOR", "TO", "AT", "BY", "ON", "IN", "OF", "IS", "IT", "OR",
+    "EMAIL", "MAIL", "SEND", "STOCK", "SHARE", "PRICE", "QUOTE", "DAILY", "TODAY",
+    "UTC", "GMT", "EST", "EDT", "PST", "PDT", "CET", "IST", "ET", "PT",
+    "US", "USA", "USD", "EUR", "GBP", "CEO", "CFO", "IPO", "EPS", "ETF", "NYSE", "PDF",
+}
+
+# Filler words that do not make an unquoted calendar title on their own
+TITLE_STOPWORDS = {
+    "a", "an", "the", "with", "for", "to", "on", "at", "from", "and", "or", "of", "in", "about",
+    "my", "me", "our", "us", "your", "new", "please", "send", "schedule", "add", "set", "up", "this", "that",
+}
+
+STOCK_RE = re.compile(r"\b(stock|share)s?\b.*\b(price|update|quote)s?\b|\bstock price\b", re.IGNORECASE)
+CALENDAR_RE = re.compile(r"\b(calendar|invite|meeting|event|appointment)\b", re.IGNORECASE)
+REMIND_RE = re.compile(r"\bremind(?:er)?\b(?:\s+me)?(?:\s+to)?\s*(.*)", re.IGNORECASE)
+EMAIL_TASK_RE = re.compile(r"\b(send|e-?mail|mail)\b", re.IGNORECASE)
+
+def _email(task):
+    match = EMAIL_RE.search(task)
+    return match.group(0) if match else None
+
+def _message(task, fallback):
+    """Return the quoted text in the task, or a cleaned-up fallback phrase."""
+    match = QUOTED_RE.search(task)
+    if match:
+        return match.group(1).strip()
+    fallback = EMAIL_RE.sub("", fallback)
+    fallback = re.split(r"\b(?:via|by|through)\s+e-?mail\b|\.\s*my e-?mail\b", fallback, flags=re.IGNORECASE)[0]
+    return fallback.strip(" .,:;-")
+
+def _normalize_datetime(value):
+    value = value.replace("T", " ")
+    return value if value.count(":") == 2 else f"{value}:00"
+
+def _stock_symbols(task):
+    """Return the distinct tickers a stock task names, in order of preference.
+
+    Known company names and $TICKER cashtags are trusted; a bare all-caps word
+    only counts if it is not a common abbreviation and the task is not shouted.
+    """
+    lowered = task.lower()
+    symbols = [ticker for name, ticker in COMPANY_SYMBOLS.items() if re.search(rf"\b{name}\b", lowered)]
+    symbols.extend(cashtag.upper() for cashtag in CASHTAG_RE.findall(task))
+    if not task.isupper():
+        symbols.extend(s for s in SYMBOL_RE.findall(task) if s not in NOT_SYMBOLS)
+    return list(dict.fromkeys(symbols))
+
+def _match_stock(task):
+    if not STOCK_RE.search(task):
+        return None
+    to_email = _email(task)
+    symbols = _stock_symbols(task)
+    time_match = TIME_RE.search(task)
+    variables = {
+        "to_email": to_email,
+        "time_str": time_match.group(1).upper() if time_match else "6 PM",
+        "symbol": symbols[0] if symbols else "NVDA",
+    }
+    # Only a task naming all three, with exactly one symbol, clears the default
+    # threshold; a defaulted symbol or time (e.g. an unknown company) or several
+    # symbols (one job per symbol) are left for the LLM to read
+    confidence = 0.45 + 0.15 * (bool(to_email) + (len(symbols) == 1) + bool(time_match))
+    return "share_stock_price", variables, round(confidence, 2)
+
+def _match_calendar(task):
+    if not CALENDAR_RE.search(task):
+        return None
+    to_email = _email(task)
+    datetimes = [_normalize_datetime(d) for d in DATETIME_RE.findall(task)]
+    if not datetimes:
+        return "add_calendar_invite", {"to_email": to_email}, 0.3
+    event_start = datetimes[0]
+    if len(datetimes) > 1:
+        event_end = datetimes[1]
+    else:
+        duration = DURATION_RE.search(task)
+        amount = float(duration.group(1)) if duration else 1.0
+        unit = timedelta(minutes=1) if duration and duration.group(2).lower().startswith("m") else timedelta(hours=1)
+        start = datetime.strptime(event_start, "%Y-%m-%d %H:%M:%S")
+        event_end = (start + unit * amount).strftime("%Y-%m-%d %H:%M:%S")
+    # Unquoted titles usually sit between the keyword and the date: "invite for Team sync on 2025-..."
+    between = task[CALENDAR_RE.search(task).end():DATETIME_RE.search(task).start()]
+    between = re.sub(
+        r"^(?:\W*\b(?:calendar|invite|meeting|event|appointment|for|called|titled|about|named)\b)+|\b(?:on|at|from)\W*$",
+        "", between.strip(), flags=re.IGNORECASE,
+    )
+    subject = _message(task, between)
+    if not subject:
+        return "add_calendar_invite", {"to_email": to_email, "event_start": event_start, "event_end": event_end}, 0.5
+    # A quoted title, or an unquoted one with at least two real words, is trusted; a
+    # leftover fragment such as "with" or "the" stays below the threshold
+    words = [w for w in re.findall(r"\w+", subject.lower()) if w not in TITLE_STOPWORDS]
+    trusted = bool(QUOTED_RE.search(task)) or len(words) >= 2
+    variables = {
+        "subject": subject,
+        "body": subject,
+        "to_email": to_email,
+        "event_start": event_start,
+        "event_end": event_end,
+    }
+    confidence = 0.6 + 0.3 * bool(to_email) if trusted else 0.5 + 0.25 * bool(to_email)
+    return "add_calendar_invite", variables, round(confidence, 2)
+
+def _match_reminder(task):
+    match = REMIND_RE.search(task)
+    if not match:
+        return None
+    to_email = _email(task)
+    body = _message(task, match.group(1))
+    if not body:
+        return "remind_me", {"to_email": to_email}, 0.3
+    body = body.rstrip(".")
+    variables = {
+        "subject": f"Reminder: {body[:60]}",
+        "body": f"Don't forget to {body[0].lower()}{body[1:]}.",
+        "to_email": to_email,
+    }
+    return "remind_me", variables, round(0.6 + 0.3 * bool(to_email), 2)
+
+def _match_email(task):
+    if not EMAIL_TASK_RE.search(task):
+        return None
+    to_email = _email(task)
+    quoted = QUOTED_RE.search(task)
+    if not quoted:
+        return "send_email", {"to_email": to_email}, 0.3
+    body = quoted.group(1).strip()
+    variables = {"subject": body[:60], "body": body, "to_email": to_email}
+    # Free-form emails are the most ambiguous rule, so stay below the default threshold
+    return "send_email", variables, round(0.5 + 0.25 * bool(to_email), 2)
+
+# Tried in order; more specific intents come first
+RULES = [_match_stock, _match_calendar, _match_reminder, _match_email]
+
+def match_task(task):
+    """Resolve a todo line to a task function without the LLM.
+
+    Returns:
+        tuple: (function_name, variables, confidence) for the best matching rule,
+        or None when no rule applies. confidence is between 0 and 1.
+    """
+    builtin = BUILTIN_TASKS.get(task.strip().lower())
+    if builtin:
+        return builtin, {}, 1.0
+    best = None
+    for rule in RULES:
+        result = rule(task)
+        if result and (best is None or result[2] > best[2]):
+            best = result
+    return best
+
+def format_analysis(function_name, variables):
+    """Render a match as the same JSON action the LLM is asked to reply with (as cached)."""
+    return serialize_action({"function": function_name, "arguments": variables})
@@ -0,0 +1,95 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+LLM_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".llm_cache.db")
+
+def normalize_task(task):
+    """Normalize task text so trivially different spellings share a cache entry."""
+    return re.sub(r"\s+", " ", task).strip().lower()
+
+def make_cache_key(model_name, catalog_hash, task):
+    """Build a cache key from the model, the function catalog and the normalized task text.
+
+    Changing the model or any task function signature/docstring invalidates
+    every entry automatically, because the key changes.
+    """
+    return hashlib.sha256(f"{model_name}\0{catalog_hash}\0{normalize_task(task)}".encode()).hexdigest()
+
+def model_name_of(model):
+    """Return the name used in cache keys for a genai.GenerativeModel (or a stand-in)."""
+    return getattr(model, "model_name", None) or type(model).__name__
+
+class LLMResponseCache:
+    """Persistent SQLite cache of LLM replies with TTL expiry and LRU eviction.
+
+    Args:
+        db_path (str, optional): Cache database path. Defaults to LLM_CACHE_PATH.
+        ttl (float, optional): Seconds an entry stays valid. Defaults to 7 days.
+        max_entries (int, optional): Size cap; least recently used entries are
+            evicted beyond it. Defaults to 5000.
+    """
+
+    def __init__(self, db_path=LLM_CACHE_PATH, ttl=7 * 24 * 3600, max_entries=5000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        """Return the cached reply for key, or None if it is missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, value):
+        """Store a reply, then drop expired entries and evict down to max_entries."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            self._conn.execute(
+                """DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def stats(self):
+        """Return hit/miss counters and the current number of entries."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
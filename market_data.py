@@ -0,0 +1,170 @@
+"""Shared quote service for stock price emails.
+
+All price lookups go through one QuoteService, which serves recent quotes from
+a short-TTL cache, coalesces concurrent requests for the same symbol into one
+fetch, and batches symbols requested close together into a single provider
+call. Providers are pluggable so a local fake can stand in for Yahoo Finance.
+"""
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import METRICS
+from rate_limit import retry_with_backoff
+
+class QuoteProvider:
+    """Interface for price sources."""
+
+    def fetch(self, symbols):
+        """Return {symbol: latest price} for the given symbols; missing symbols are omitted."""
+        raise NotImplementedError
+
+class YahooProvider(QuoteProvider):
+    """Latest close prices from Yahoo Finance, all symbols in one yf.download call."""
+
+    def fetch(self, symbols):
+        import yfinance as yf
+
+        data = yf.download(list(symbols), period="1d", group_by="ticker", progress=False, auto_adjust=False)
+        if data.empty:
+            raise ValueError("Empty stock data returned. Check symbol or try later.")
+        prices = {}
+        for symbol in symbols:
+            try:
+                closes = data[symbol]["Close"] if symbol in data.columns.get_level_values(0) else data["Close"]
+            except KeyError:
+                continue
+            closes = closes.dropna()
+            if not closes.empty:
+                prices[symbol] = float(closes.iloc[-1])
+        return prices
+
+class QuoteService:
+    """Cached, coalescing, batching front end to a QuoteProvider.
+
+    Args:
+        provider (QuoteProvider): Where prices come from
+        ttl (float, optional): Seconds a fetched price is served from cache. Defaults to 60.
+        batch_window (float, optional): Seconds to wait for more symbols before
+            fetching, so requests arriving together share one call. Defaults to 0.05.
+        retries (int, optional): Default retries per batch with exponential backoff. Defaults to 3.
+        backoff (float, optional): Default base backoff delay in seconds. Defaults to 5.
+
+    get_quotes() and get_quote() can ask for other retries/backoff per request; a
+    batch shared by several requests retries as patiently as the most patient one.
+    """
+
+    def __init__(self, provider, ttl=60.0, batch_window=0.05, retries=3, backoff=5.0, clock=time.monotonic):
+        self.provider = provider
+        self.ttl = ttl
+        self.batch_window = batch_window
+        self.retries = retries
+        self.backoff = backoff
+        self._clock = clock
+        self._cache = {}
+        self._inflight = {}
+        self._pending = []
+        self._pending_retry = None
+        self._lock = threading.Lock()
+        self.fetch_calls = 0
+
+    def _fetch_batch(self):
+        """Collect the pending symbols after the batch window and fetch them in one call."""
+        time.sleep(self.batch_window)
+        with self._lock:
+            batch, self._pending = self._pending, []
+            (retries, backoff), self._pending_retry = self._pending_retry, None
+        if not batch:
+            return
+
+        def on_retry(attempt, e, delay):
+            print(f"❌ Failed to retrieve stock prices for {', '.join(batch)} (Attempt {attempt}/{retries + 1}): {str(e)}")
+            print(f"🔄 Retrying in {delay:.1f} seconds...")
+
+        def fetch():
+            with METRICS.timer("quote_fetch"):
+                return self.provider.fetch(batch)
+
+        try:
+            self.fetch_calls += 1
+            prices = retry_with_backoff(fetch, retries=retries, base=backoff, on_retry=on_retry)
+            error = None
+        except Exception as e:
+            prices, error = {}, e
+
+        now = self._clock()
+        with self._lock:
+            for symbol in batch:
+                future = self._inflight.pop(symbol)
+                if symbol in prices:
+                    self._cache[symbol] = (prices[symbol], now)
+                    future.set_result(prices[symbol])
+                else:
+                    future.set_exception(error or LookupError(f"No price returned for {symbol}"))
+
+    def get_quotes(self, symbols, retries=None, backoff=None):
+        """Return {symbol: price} for symbols, fetching what is not cached in one batch.
+
+        Args:
+            symbols (iterable): Ticker symbols
+            retries (int, optional): Retries for this request. Defaults to the service's.
+            backoff (float, optional): Base backoff delay for this request. Defaults to the service's.
+
+        Symbols whose price could not be fetched are omitted.
+        """
+        symbols = [s.upper() for s in symbols]
+        retry = (self.retries if retries is None else retries, self.backoff if backoff is None else backoff)
+        now = self._clock()
+        futures = {}
+        leader = False
+        with self._lock:
+            for symbol in symbols:
+                cached = self._cache.get(symbol)
+                if cached and now - cached[1] < self.ttl:
+                    futures[symbol] = cached[0]
+                elif symbol in self._inflight:
+                    futures[symbol] = self._inflight[symbol]  # Coalesce with a fetch already under way
+                else:
+                    future = Future()
+                    self._inflight[symbol] = future
+                    futures[symbol] = future
+                    if not self._pending:
+                        leader = True  # First new symbol of a batch; this caller runs the fetch
+                    self._pending.append(symbol)
+                    pending = self._pending_retry or retry
+                    self._pending_retry = (max(pending[0], retry[0]), max(pending[1], retry[1]))
+        if leader:
+            self._fetch_batch()
+
+        quotes = {}
+        for symbol, value in futures.items():
+            if isinstance(value, Future):
+                try:
+                    quotes[symbol] = value.result()
+                except Exception as e:
+                    print(f"❌ Failed to retrieve stock price for {symbol}: {str(e)}")
+            else:
+                quotes[symbol] = value
+        return quotes
+
+    def get_quote(self, symbol, retries=None, backoff=None):
+        """Return the price for one symbol, or None if it could not be fetched."""
+        return self.get_quotes([symbol], retries, backoff).get(symbol.upper())
+
+_default_service = None
+_default_lock = threading.Lock()
+
+def get_quote_service():
+    """Return the process-wide QuoteService backed by Yahoo Finance."""
+    global _default_service
+    with _default_lock:
+        if _default_service is None:
+            _default_service = QuoteService(YahooProvider())
+        return _default_service
+
+def set_quote_provider(provider, **options):
+    """Replace the process-wide QuoteService with one using provider (e.g. fakes.FakeQuoteProvider)."""
+    global _default_service
+    with _default_lock:
+        _default_service = QuoteService(provider, **options)
+        return _default_service
@@ -0,0 +1,164 @@
+"""Run metrics for the organizer, compressors, LLM, SMTP and quote stages.
+
+Each stage ("scan", "move", "image_compress", "pdf_compress", "llm_call",
+"smtp_send", "quote_fetch") accumulates a call count, error count, wall time
+and bytes in/out in the process-wide METRICS registry. At the end of a run the
+registry is written as a JSON summary; while a run is going it can also be
+scraped in Prometheus text format, and profiled() wraps a run in cProfile.
+
+Work done in worker processes is recorded by the parent from the result dicts
+the jobs already return, since each process has its own registry.
+"""
+import cProfile
+import io
+import json
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list; None when it is empty."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+class Metrics:
+    """Thread-safe per-stage counters and timers.
+
+    Args:
+        sample_size (int, optional): Single-operation durations kept per stage
+            (reservoir sampling) for the latency percentiles. Defaults to 2048.
+    """
+
+    def __init__(self, sample_size=2048):
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._samples = {}
+        self.started = time.time()
+
+    def observe(self, stage, seconds=0.0, count=1, errors=0, bytes_in=0, bytes_out=0):
+        """Add `count` operations of a stage that took `seconds` in total."""
+        with self._lock:
+            s = self._stages.get(stage)
+            if s is None:
+                s = self._stages[stage] = {"count": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0,
+                                           "bytes_in": 0, "bytes_out": 0}
+            s["count"] += count
+            s["errors"] += errors
+            s["seconds"] += seconds
+            s["max_seconds"] = max(s["max_seconds"], seconds / count if count > 1 else seconds)
+            s["bytes_in"] += bytes_in
+            s["bytes_out"] += bytes_out
+            if count == 1:
+                samples = self._samples.setdefault(stage, [])
+                if len(samples) < self.sample_size:
+                    samples.append(seconds)
+                else:
+                    slot = random.randrange(s["count"])
+                    if slot < self.sample_size:
+                        samples[slot] = seconds
+
+    @contextmanager
+    def timer(self, stage, bytes_in=0):
+        """Time one operation. The yielded dict may be updated with bytes_in/bytes_out;
+        an exception counts as an error and is re-raised."""
+        sample = {"bytes_in": bytes_in, "bytes_out": 0}
+        started = time.perf_counter()
+        try:
+            yield sample
+        except BaseException:
+            self.observe(stage, time.perf_counter() - started, errors=1, **sample)
+            raise
+        self.observe(stage, time.perf_counter() - started, **sample)
+
+    def summary(self):
+        """Return {"elapsed": seconds, "stages": {stage: {count, errors, error_rate, seconds,
+        avg_seconds, max_seconds, p50_seconds, p95_seconds, p99_seconds, bytes_in, bytes_out}}}."""
+        with self._lock:
+            stages = {name: dict(s) for name, s in self._stages.items()}
+            samples = {name: sorted(values) for name, values in self._samples.items()}
+        for name, s in stages.items():
+            s["error_rate"] = s["errors"] / s["count"] if s["count"] else 0.0
+            s["avg_seconds"] = s["seconds"] / s["count"] if s["count"] else 0.0
+            for p in (50, 95, 99):
+                s[f"p{p}_seconds"] = percentile(samples.get(name, []), p)
+        return {"elapsed": time.time() - self.started, "stages": stages}
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def prometheus_text(self):
+        """Render the counters in the Prometheus text exposition format."""
+        series = [
+            ("count", "organizer_stage_operations_total", "counter", "Operations per stage"),
+            ("errors", "organizer_stage_errors_total", "counter", "Failed operations per stage"),
+            ("seconds", "organizer_stage_seconds_total", "counter", "Total seconds spent per stage"),
+            ("max_seconds", "organizer_stage_max_seconds", "gauge", "Slowest single operation per stage"),
+            ("bytes_in", "organizer_stage_bytes_in_total", "counter", "Bytes read per stage"),
+            ("bytes_out", "organizer_stage_bytes_out_total", "counter", "Bytes written per stage"),
+        ]
+        stages = self.summary()["stages"]
+        lines = []
+        for key, name, kind, help_text in series:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f'{name}{{stage="{stage}"}} {s[key]}' for stage, s in sorted(stages.items()))
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._samples.clear()
+            self.started = time.time()
+
+# Process-wide registry used by all instrumented stages
+METRICS = Metrics()
+
+def serve_prometheus(port, host="127.0.0.1", metrics=METRICS):
+    """Serve metrics.prometheus_text() at /metrics from a daemon thread.
+
+    Returns:
+        ThreadingHTTPServer: Call shutdown() to stop it.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    print(f"📈 Metrics at http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+@contextmanager
+def profiled(output_path=None, top=25):
+    """Run the block under cProfile; save raw stats to output_path (for snakeviz/pstats)
+    and print the `top` functions by cumulative time."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if output_path:
+            profiler.dump_stats(output_path)
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(top)
+        print(stream.getvalue())
@@ -0,0 +1,124 @@
+"""Offline PDF compression with PyPDF2 and PIL, used by Root_functions.compress_pdf(backend="local")."""
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+
+from PIL import Image
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import NameObject, NullObject, NumberObject
+
+def _downsample_image(image, max_dimension, quality):
+    """Re-encode an image XObject as a smaller JPEG in place. Returns True if it shrank."""
+    if image.get("/SMask") is not None or image.get("/ImageMask"):
+        return False  # Transparency and stencil masks do not survive a JPEG round trip
+    filters = image.get("/Filter")
+    if isinstance(filters, list):
+        filters = filters[0] if len(filters) == 1 else None
+    width, height = int(image["/Width"]), int(image["/Height"])
+    if filters == "/DCTDecode":
+        img = Image.open(io.BytesIO(image._data))
+        # Decode JPEGs at reduced size straight away when they will be shrunk anyway
+        img.draft(img.mode, (max_dimension, max_dimension))
+    elif filters == "/FlateDecode" and image.get("/BitsPerComponent") == 8 and not image.get("/DecodeParms"):
+        mode = {"/DeviceRGB": "RGB", "/DeviceGray": "L"}.get(image.get("/ColorSpace"))
+        if mode is None:
+            return False
+        img = Image.frombytes(mode, (width, height), image.get_data())
+    else:
+        return False
+
+    if img.mode not in ("RGB", "L"):
+        return False
+    img.thumbnail((max_dimension, max_dimension))
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=quality, optimize=True)
+    data = buffer.getvalue()
+    if len(data) >= len(image._data):
+        return False
+
+    image._data = data
+    image[NameObject("/Filter")] = NameObject("/DCTDecode")
+    image[NameObject("/Width")] = NumberObject(img.width)
+    image[NameObject("/Height")] = NumberObject(img.height)
+    image[NameObject("/ColorSpace")] = NameObject("/DeviceRGB" if img.mode == "RGB" else "/DeviceGray")
+    image[NameObject("/Length")] = NumberObject(len(data))
+    if "/DecodeParms" in image:
+        del image["/DecodeParms"]
+    return True
+
+def _stream_key(obj):
+    """Hash a stream object's dictionary and raw data so identical streams compare equal."""
+    digest = hashlib.sha256(obj._data)
+    for key in sorted(k for k in obj if k != "/Length"):
+        digest.update(f"{key}={obj[key]!r}".encode())
+    return digest.hexdigest()
+
+def compress_pdf_local(input_path, output_path=None, image_quality=60, max_image_dimension=1600):
+    """Compress a PDF without any network access.
+
+    Compresses page content streams, downsamples embedded images larger than
+    max_image_dimension, and deduplicates identical image/form XObjects so
+    repeated logos or scans are stored once.
+
+    Args:
+        input_path (str): Path to the input PDF file
+        output_path (str, optional): Where to write the result. Defaults to
+            replacing input_path. If the result is not smaller, the original
+            is kept (or copied to output_path).
+        image_quality (int, optional): JPEG quality for re-encoded images. Defaults to 60.
+        max_image_dimension (int, optional): Longest side, in pixels, of
+            re-encoded images. Defaults to 1600.
+    """
+    reader = PdfReader(input_path)
+    writer = PdfWriter()
+    seen = {}
+    replaced = {}
+    processed = set()
+
+    for page in reader.pages:
+        page = writer.add_page(page)
+        resources = page.get("/Resources")
+        xobjects = resources.get_object().get("/XObject") if resources is not None else None
+        if xobjects is not None:
+            xobjects = xobjects.get_object()
+            for name in list(xobjects):
+                ref = xobjects.raw_get(name)
+                obj = xobjects[name].get_object()
+                if getattr(ref, "idnum", None) in replaced:
+                    xobjects[NameObject(name)] = replaced[ref.idnum]
+                    continue
+                if not hasattr(obj, "_data") or getattr(ref, "idnum", None) is None:
+                    continue
+                if ref.idnum not in processed:
+                    processed.add(ref.idnum)
+                    if obj.get("/Subtype") == "/Image":
+                        _downsample_image(obj, max_image_dimension, image_quality)
+                key = _stream_key(obj)
+                first = seen.setdefault(key, ref)
+                if first.idnum != ref.idnum:
+                    # Point at the first copy and drop this one from the output
+                    xobjects[NameObject(name)] = first
+                    replaced[ref.idnum] = first
+                    writer._objects[ref.idnum - 1] = NullObject()
+        page.compress_content_streams()
+
+    writer.add_metadata({k: v for k, v in (reader.metadata or {}).items() if isinstance(v, str)})
+    output_path = output_path or input_path
+    # A unique temp file next to the output, so concurrent runs never share one and
+    # readers never see a half-written PDF
+    directory, name = os.path.split(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".pdf", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            writer.write(f)
+        if os.path.getsize(tmp_path) >= os.path.getsize(input_path):
+            # Already as small as we can make it; keep the original bytes
+            if os.path.abspath(input_path) == os.path.abspath(output_path):
+                return
+            shutil.copyfile(input_path, tmp_path)
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,67 @@
+import random
+import threading
+import time
+
+class TokenBucket:
+    """Thread-safe token bucket limiting calls to `rate` per second with bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` tokens are available, then take them."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait_time = (tokens - self._tokens) / self.rate
+            self._sleep(wait_time)
+
+def backoff_delays(retries, base=1.0, cap=60.0, jitter=True):
+    """Yield `retries` exponential backoff delays (base * 2**n, capped).
+
+    With jitter each delay is drawn uniformly from [0, delay] ("full jitter"),
+    which keeps many concurrent clients from retrying in lockstep.
+    """
+    for attempt in range(retries):
+        delay = min(cap, base * (2 ** attempt))
+        yield random.uniform(0, delay) if jitter else delay
+
+def retry_with_backoff(func, retries=3, base=1.0, cap=60.0, jitter=True, retry_on=Exception,
+                       on_retry=None, sleep=time.sleep):
+    """Call func(), retrying on `retry_on` exceptions with exponential backoff.
+
+    Args:
+        func (callable): Zero-argument callable to run
+        retries (int, optional): Number of retries after the first attempt. Defaults to 3.
+        base, cap, jitter: Backoff settings, see backoff_delays().
+        retry_on (type or tuple, optional): Exceptions that trigger a retry. Others
+            propagate immediately.
+        on_retry (callable, optional): Called as on_retry(attempt, exc, delay) before sleeping.
+
+    Returns:
+        The return value of func(). The last exception is re-raised once retries run out.
+    """
+    delays = backoff_delays(retries, base, cap, jitter)
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except retry_on as e:
+            delay = next(delays, None)
+            if delay is None:
+                raise
+            attempt += 1
+            if on_retry is not None:
+                on_retry(attempt, e, delay)
+            sleep(delay)
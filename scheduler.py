@@ -0,0 +1,269 @@
+"""Single event-driven scheduler for recurring task jobs.
+
+Jobs live in a heap ordered by due time; one thread sleeps until the earliest
+due time (or until a job is added) instead of polling, and due jobs run on a
+bounded worker pool. Jobs are persisted to a JSON store, so schedules survive
+restarts.
+
+The store is shared by every process using it (a --watch daemon and headless
+runs, say): each change re-reads it under a file lock, applies the change and
+writes it back, and a running scheduler reloads the store when another process
+has changed it. A due time is claimed in the store, under the lock, before the
+job runs, so it fires exactly once however many schedulers are running.
+"""
+import heapq
+import importlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Not on POSIX; the store is then only safe for one process at a time
+    fcntl = None
+
+JOB_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".scheduled_jobs.json")
+
+def parse_time_of_day(value):
+    """Parse "HH:MM" or "HH:MM:SS" (24-hour) into (hour, minute, second)."""
+    parts = [int(p) for p in value.split(":")]
+    if len(parts) not in (2, 3):
+        raise ValueError(f"Invalid time of day '{value}'. Use 'HH:MM' or 'HH:MM:SS'.")
+    hour, minute, second = (parts + [0])[:3]
+    if not (0 <= hour < 24 and 0 <= minute < 60 and 0 <= second < 60):
+        raise ValueError(f"Invalid time of day '{value}'.")
+    return hour, minute, second
+
+def next_daily_run(at, after):
+    """Return the first timestamp strictly after `after` that falls on time of day `at`."""
+    hour, minute, second = parse_time_of_day(at)
+    moment = datetime.fromtimestamp(after)
+    candidate = moment.replace(hour=hour, minute=minute, second=second, microsecond=0)
+    if candidate.timestamp() <= after:
+        candidate += timedelta(days=1)
+    return candidate.timestamp()
+
+def _resolve(func_ref):
+    module_name, func_name = func_ref.split(":", 1)
+    return getattr(importlib.import_module(module_name), func_name)
+
+class Scheduler:
+    """Heap-based daily job scheduler with a persistent, shared job store.
+
+    Args:
+        store_path (str, optional): JSON job store; None keeps jobs in memory only.
+        max_workers (int, optional): Size of the pool that runs due jobs. Defaults to 4.
+        misfire_grace (float, optional): A due time missed by at most this many
+            seconds (e.g. during a restart) still fires once; older ones are
+            skipped. Defaults to 300.
+        reload_interval (float, optional): How often a running scheduler checks
+            the store for jobs added or removed by other processes. Defaults to 5.
+        clock (callable, optional): Returns the current Unix time.
+    """
+
+    def __init__(self, store_path=JOB_STORE_PATH, max_workers=4, misfire_grace=300.0, reload_interval=5.0,
+                 clock=time.time):
+        self.store_path = store_path
+        self.misfire_grace = misfire_grace
+        self.reload_interval = reload_interval
+        self._clock = clock
+        self._jobs = {}
+        self._heap = []
+        self._store_stamp = None
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scheduler")
+        self._thread = None
+        self._running = False
+        with self._cond:
+            self._sync()
+
+    def _stat_store(self):
+        try:
+            st = os.stat(self.store_path)
+        except OSError:
+            return None
+        # os.replace() gives the store a new inode on every write
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    @contextmanager
+    def _store_lock(self):
+        """Hold an exclusive lock on the store (a sidecar .lock file) across processes."""
+        if not self.store_path or fcntl is None:
+            yield
+            return
+        with open(f"{self.store_path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_store(self):
+        self._store_stamp = self._stat_store()
+        if self._store_stamp is None:
+            return {}
+        with open(self.store_path, "r", encoding="utf-8") as f:
+            return {job["id"]: job for job in json.load(f)}
+
+    def _write_store(self, jobs):
+        directory = os.path.dirname(os.path.abspath(self.store_path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".jobs.", dir=directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(list(jobs.values()), f, indent=2)
+        os.replace(tmp_path, self.store_path)
+        self._store_stamp = self._stat_store()
+
+    def _normalize(self, job, now):
+        """Move a job's next run past due times that already fired or were missed by more than misfire_grace."""
+        due = job["next_run"]
+        if due <= job.get("last_fired", 0) or now - due > self.misfire_grace:
+            job["next_run"] = next_daily_run(job["at"], max(now, job.get("last_fired", 0)))
+
+    def _sync(self, change=None):
+        """Reload the jobs from the store, apply change(jobs) and write them back, all under the store lock.
+
+        The result becomes the in-memory job set and heap. Call with self._cond held.
+
+        Returns:
+            The return value of change, or None.
+        """
+        result = None
+        with self._store_lock():
+            jobs, writable = dict(self._jobs), False
+            if self.store_path:
+                try:
+                    jobs, writable = self._read_store(), True
+                except (OSError, ValueError, KeyError) as e:
+                    # Keep working from memory, but never overwrite a store we could not read
+                    print(f"❌ Could not read job store {self.store_path}: {e}")
+            now = self._clock()
+            for job in jobs.values():
+                self._normalize(job, now)
+            if change is not None:
+                result = change(jobs)
+                if writable:
+                    self._write_store(jobs)
+        self._jobs = jobs
+        self._heap = [(job["next_run"], job_id) for job_id, job in jobs.items()]
+        heapq.heapify(self._heap)
+        self._cond.notify()
+        return result
+
+    def _store_changed(self):
+        return bool(self.store_path) and self._stat_store() != self._store_stamp
+
+    def add_daily(self, job_id, func_ref, kwargs=None, at="18:00"):
+        """Schedule func_ref ("module:function") to run with kwargs every day at `at`.
+
+        Adding a job with an existing id replaces it, so re-running the same todo
+        line does not create duplicate jobs.
+
+        Returns:
+            float: Unix time of the next run.
+        """
+        _resolve(func_ref)  # Fail now rather than at the first due time
+
+        def put(jobs):
+            job = {
+                "id": job_id,
+                "func": func_ref,
+                "kwargs": kwargs or {},
+                "at": at,
+                "next_run": next_daily_run(at, self._clock()),
+                "last_fired": jobs.get(job_id, {}).get("last_fired", 0),
+            }
+            jobs[job_id] = job
+            return job["next_run"]
+
+        with self._cond:
+            return self._sync(put)
+
+    def remove(self, job_id):
+        """Remove a job; returns True if it existed."""
+        with self._cond:
+            return self._sync(lambda jobs: jobs.pop(job_id, None) is not None)
+
+    def jobs(self):
+        """Return a copy of the scheduled jobs."""
+        with self._cond:
+            if self._store_changed():
+                self._sync()
+            return [dict(job) for job in self._jobs.values()]
+
+    def _run_job(self, job):
+        try:
+            _resolve(job["func"])(**job["kwargs"])
+        except Exception as e:
+            print(f"❌ Scheduled job {job['id']} failed: {e}")
+
+    def _claim(self, jobs, job_id, due):
+        """Mark due as fired in jobs and return a copy of the job, or None if it is not due there."""
+        job = jobs.get(job_id)
+        if job is None or job["next_run"] != due:
+            return None  # Removed, rescheduled, or already fired by another process
+        job["last_fired"] = due
+        job["next_run"] = next_daily_run(job["at"], due)
+        return dict(job)
+
+    def _loop(self):
+        with self._cond:
+            while self._running:
+                if self._store_changed():
+                    self._sync()
+                if not self._heap:
+                    self._cond.wait(self.reload_interval if self.store_path else None)
+                    continue
+                due, job_id = self._heap[0]
+                job = self._jobs.get(job_id)
+                if job is None or job["next_run"] != due:
+                    heapq.heappop(self._heap)  # Removed or rescheduled; stale heap entry
+                    continue
+                delay = due - self._clock()
+                if delay > 0:
+                    self._cond.wait(min(delay, self.reload_interval) if self.store_path else delay)
+                    continue
+                # Claimed in the store before running, so neither a restart nor another
+                # process sharing the store can fire this due time again
+                claimed = self._sync(lambda jobs: self._claim(jobs, job_id, due))
+                if claimed is not None:
+                    self._pool.submit(self._run_job, claimed)
+
+    def start(self):
+        """Start the scheduler thread (idempotent)."""
+        with self._cond:
+            if self._running:
+                return self
+            self._running = True
+        self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, wait=True):
+        """Stop scheduling new runs and optionally wait for running jobs."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self._pool.shutdown(wait=wait)
+
+    def wait(self):
+        """Block the calling thread while the scheduler runs (until KeyboardInterrupt or stop())."""
+        while self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=1.0)  # Short joins keep Ctrl+C responsive
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+def get_scheduler():
+    """Return the process-wide scheduler, loading persisted jobs and starting it on first use."""
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = Scheduler().start()
+        return _default_scheduler
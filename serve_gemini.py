@@ -1,7 +1,5 @@
-import google.generativeai as genai
 import os
 from dotenv import load_dotenv
-from google.cloud import secretmanager
 import warnings
 import logging
 from Root_functions import (
@@ -10,16 +8,31 @@ from Root_functions import (
     compress_images_in_folder,
     remind_me,
     add_calendar_invite,
+    add_calendar_invites,
     share_stock_price,
     send_email
 )
+from file_index import FileIndex, INDEX_FILENAME
+from function_catalog import load_function_catalog
+from scheduler import get_scheduler
+from llm_cache import LLMResponseCache, make_cache_key, model_name_of
+from intent_rules import match_task, format_analysis, DEFAULT_THRESHOLD
+from action_schema import (
+    ACTION_FORMAT, describe_schemas, parse_action, parse_batch_actions, parse_json_reply, serialize_action,
+    validate_action,
+)
+import hashlib
+import json
+import argparse
+import contextlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from watcher import DirectoryWatcher
+from metrics import METRICS, profiled, serve_prometheus
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import re
 import sys
-from datetime import datetime
-import pytz
 import time
 
 def configure_environment():
@@ -42,18 +55,55 @@ def get_api_key():
     """Retrieve API key from environment variable."""
     return os.getenv("GEMINI_API_KEY")
 
+class LazyGeminiModel:
+    """Stand-in for genai.GenerativeModel that imports and configures google.generativeai
+    on the first request, so runs that never ask the LLM do not pay for loading it."""
+
+    def __init__(self, model_name, api_key):
+        self.model_name = f"models/{model_name}"  # Same name genai reports, so cache keys match
+        self._api_key = api_key
+        self._model = None
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, **kwargs):
+        with self._lock:
+            if self._model is None:
+                import google.generativeai as genai
+
+                genai.configure(api_key=self._api_key)
+                self._model = genai.GenerativeModel(self.model_name)
+        return self._model.generate_content(prompt, **kwargs)
+
 def initialize_llms(api_key):
     """Initialize and configure both LLMs with the provided API key."""
-    genai.configure(api_key=api_key)
     return (
-        genai.GenerativeModel('gemini-2.0-flash'),  # organizer_llm
-        genai.GenerativeModel('gemini-2.0-flash')   # task_analyzer_llm
+        LazyGeminiModel('gemini-2.0-flash', api_key),  # organizer_llm
+        LazyGeminiModel('gemini-2.0-flash', api_key)   # task_analyzer_llm
     )
 
-def read_root_functions():
-    """Read and return the content of Root_functions.py."""
-    with open("Root_functions.py", "r", encoding="utf-8") as file:
-        return file.read()
+def ask_user(function_name, description):
+    """Interactive approver: ask on the console before running a task."""
+    proceed = input(f"\nShould I proceed with the task? (yes/no): ")
+    return proceed.lower() == 'yes'
+
+def load_policy(policy_path):
+    """Load an auto-approve policy file for headless runs.
+
+    The file is JSON of the form ``{"allow": ["categorize_and_move_files", "remind_me"]}``;
+    ``"allow": "*"`` approves every task function.
+    """
+    with open(policy_path, "r", encoding="utf-8") as f:
+        policy = json.load(f)
+    allow = policy.get("allow", [])
+    return set(allow) if isinstance(allow, list) else {allow}
+
+def policy_approver(allowed):
+    """Return an approver that accepts exactly the function names in allowed ("*" accepts all)."""
+    def approve(function_name, description):
+        approved = "*" in allowed or function_name in allowed
+        print(f"{'✓ Auto-approved' if approved else '✗ Not allowed by policy'}: {function_name}")
+        return approved
+    return approve
 
 def read_to_do_tasks(directory_path):
     """Read and return the content of to_do.txt from the specified directory."""
@@ -70,125 +120,248 @@ def read_to_do_tasks(directory_path):
         print(f"Error opening to_do.txt: {e}")
         return []
 
-def analyze_tasks_with_llm(task_analyzer_llm, tasks, root_functions_content):
-    """Use LLM to analyze tasks, suggest functions, and execute based on user confirmation."""
-    for task in tasks:
-        task_prompt = f"""Given these functions from Root_functions.py:
+def _task_prompt(task, root_functions_content):
+    """Build the single-task analysis prompt."""
+    return f"""Given these functions from Root_functions.py:
         {root_functions_content}
         
-        For the task: "{task}", determine the most appropriate function in Root_functions.py to use. 
-        I just want these, please don't include anything else.
+        For the task: "{task}", determine the most appropriate function to use and its arguments.
+        Answer with one JSON object and nothing else, using one of these functions and argument types:
+        {describe_schemas()}
         Example:
         Task: Remind me to "Do EPAI Assignment by Sunday" via email. My email is ajaynadimpallikumar@gmail.com
-        Function: remind_me
-        Variables:
-        - subject = "EPAI Assignment Reminder"
-        - body = "Don't forget to do the EPAI Assignment by Sunday."
-        - to_email = "ajaynadimpallikumar@gmail.com"
-        - X_PM = "6 PM"  # Add this line to include the scheduled time
+        {{"function": "remind_me", "arguments": {{"subject": "EPAI Assignment Reminder", "body": "Don't forget to do the EPAI Assignment by Sunday.", "to_email": "ajaynadimpallikumar@gmail.com"}}}}
+        """
+
+def _batch_prompt(tasks, root_functions_content):
+    """Build one prompt asking for the analysis of several numbered tasks."""
+    numbered = "\n".join(f"{i}. {task}" for i, task in enumerate(tasks, 1))
+    return f"""Given these functions from Root_functions.py:
+        {root_functions_content}
+        
+        For each numbered task below, determine the most appropriate function to use and its arguments.
+        Answer with one JSON object and nothing else: {{"tasks": [one entry per task, in order]}}, using one
+        of these functions and argument types:
+        {describe_schemas()}
+        Example entry:
+        {{"task": 1, "function": "remind_me", "arguments": {{"subject": "EPAI Assignment Reminder", "body": "Don't forget to do the EPAI Assignment by Sunday.", "to_email": "ajaynadimpallikumar@gmail.com"}}}}
         
+        Tasks:
+        {numbered}
         """
+
+def _repair_prompt(items):
+    """Build one prompt re-asking only the invalid fields of (task, action, errors) items."""
+    entries = "\n".join(
+        json.dumps({"item": number, "task": task, "function": action["function"],
+                    "invalid_fields": errors})
+        for number, (task, action, errors) in enumerate(items, 1)
+    )
+    return f"""These task actions have missing or invalid arguments. Argument types:
+        {describe_schemas()}
         
-        analysis = task_analyzer_llm.generate_content(task_prompt)
+        For each item, give corrected values for the invalid fields only, taken from the task text.
+        Answer with one JSON object and nothing else: {{"items": [{{"item": 1, "arguments": {{field: value}}}}]}}
         
-        # Extract and print only the relevant parts
+        {entries}
+        """
+
+def _generate(model, prompt, json_reply=False):
+    """Call model.generate_content and return the reply text, recording an llm_call metric.
+
+    With json_reply, the model is asked for a JSON response (Gemini JSON mode).
+    """
+    options = {"generation_config": {"response_mime_type": "application/json"}} if json_reply else {}
+    with METRICS.timer("llm_call", bytes_in=len(prompt.encode())) as sample:
+        text = model.generate_content(prompt, **options).text
+        sample["bytes_out"] = len(text.encode())
+    return text
+
+def repair_actions(task_analyzer_llm, items):
+    """Re-ask the model for just the invalid fields of several actions, in one request.
+
+    Args:
+        items (list): (task, action, errors) tuples, errors as returned by validate_action()
+
+    Returns:
+        list[dict]: The actions with the returned fields merged in, in input order.
+    """
+    reply = parse_json_reply(_generate(task_analyzer_llm, _repair_prompt(items), json_reply=True))
+    fixes = {}
+    for position, entry in enumerate(reply.get("items", []) if isinstance(reply, dict) else [], 1):
+        if isinstance(entry, dict) and isinstance(entry.get("arguments"), dict):
+            fixes[entry.get("item", position)] = entry["arguments"]
+    repaired = []
+    for number, (task, action, errors) in enumerate(items, 1):
+        arguments = dict(action["arguments"])
+        arguments.update({k: v for k, v in fixes.get(number, {}).items() if k in errors})
+        repaired.append({"function": action["function"], "arguments": arguments})
+    return repaired
+
+def analyze_tasks_with_llm(task_analyzer_llm, tasks, root_functions_content, batch_size=10, cache=None,
+                           rule_threshold=DEFAULT_THRESHOLD, approve=ask_user):
+    """Use LLM to analyze tasks, suggest functions, and execute based on user confirmation.
+
+    Tasks that intent_rules.match_task() resolves with at least rule_threshold
+    confidence never reach the LLM. The rest are sent in chunks of batch_size per
+    request and answered as JSON actions; only tasks missing from the batched
+    reply are re-asked one at a time. Actions are validated against their
+    function's schema, and invalid or missing fields are re-asked once, all
+    invalid tasks of a chunk in one request. With a cache (LLMResponseCache),
+    previously analyzed tasks are answered without any request.
+
+    approve(function_name, description) decides whether each task runs; it
+    defaults to asking on the console. Approved calendar invites are sent
+    together at the end, over one SMTP session.
+
+    Returns:
+        list[dict]: Per task: ``task``, ``function``, ``approved``, ``ok`` and
+        ``errors`` (fields still invalid after the re-ask).
+    """
+    batch_size = max(1, batch_size or 1)
+    catalog_hash = hashlib.sha256(f"{ACTION_FORMAT}\0{root_functions_content}".encode()).hexdigest()
+    model_name = model_name_of(task_analyzer_llm)
+    keys = [make_cache_key(model_name, catalog_hash, task) for task in tasks]
+    actions = [None] * len(tasks)
+    for i, task in enumerate(tasks):
+        # Recognizable tasks are resolved locally; the LLM only sees low-confidence ones
+        match = match_task(task)
+        if match and match[2] >= rule_threshold:
+            actions[i] = {"function": match[0], "arguments": match[1]}
+        elif cache is not None:
+            cached = cache.get(keys[i])
+            actions[i] = parse_action(cached) if cached is not None else None
+    missing = [i for i, action in enumerate(actions) if action is None]
+
+    for start in range(0, len(missing), batch_size):
+        chunk = missing[start:start + batch_size]
+        parsed = {}
+        if len(chunk) > 1:
+            reply = _generate(task_analyzer_llm, _batch_prompt([tasks[i] for i in chunk], root_functions_content),
+                              json_reply=True)
+            parsed = parse_batch_actions(reply, len(chunk))
+        for number, i in enumerate(chunk, 1):
+            if number not in parsed:
+                # Fall back to a single-task request for entries the batch reply missed
+                reply = _generate(task_analyzer_llm, _task_prompt(tasks[i], root_functions_content), json_reply=True)
+                parsed[number] = parse_action(reply)
+            actions[i] = parsed[number]
+
+        invalid = []
+        for i in chunk:
+            if actions[i] is not None:
+                errors = validate_action(actions[i]["function"], actions[i]["arguments"])[1]
+                if errors and "function" not in errors:
+                    invalid.append((i, errors))
+        if invalid:
+            repaired = repair_actions(task_analyzer_llm, [(tasks[i], actions[i], errors) for i, errors in invalid])
+            for (i, _), action in zip(invalid, repaired):
+                actions[i] = action
+        if cache is not None:
+            for i in chunk:
+                if actions[i] is not None and not validate_action(actions[i]["function"], actions[i]["arguments"])[1]:
+                    cache.put(keys[i], serialize_action(actions[i]))
+
+    results = []
+    invites = []
+    for task, action in zip(tasks, actions):
         print("\n=== Task Analysis ===")
-        print(analysis.text.strip())
+        print(f"Task: {task}")
+        if action is None:
+            print("❌ The model did not return a usable action for this task.")
+            results.append({"task": task, "function": None, "approved": False, "ok": None, "errors": {}})
+            continue
+        print(format_analysis(action["function"], action["arguments"]))
 
-        # Ask for user confirmation immediately after analysis
-        proceed = input(f"\nShould I proceed with the task? (yes/no): ")
-        if proceed.lower() == 'yes':
-            # Execute the function using the provided analysis
-            execute_from_analysis(analysis.text)
+        errors = validate_action(action["function"], action["arguments"])[1]
+        result = {"task": task, "function": action["function"], "approved": False, "ok": None, "errors": errors}
+        if errors:
+            print(f"❌ Invalid arguments: {errors}")
+        # Ask for confirmation immediately after analysis
+        elif approve(action["function"], task):
+            result["approved"] = True
+            if action["function"] == "add_calendar_invite":
+                invites.append((result, validate_action(action["function"], action["arguments"])[0]))
+            else:
+                result["ok"] = execute_task(action["function"], action["arguments"])
+        results.append(result)
 
+    if invites:
+        # All approved invites go out as one bulk job over a single SMTP session
+        errors = add_calendar_invites([values for _, values in invites])
+        for (result, _), error in zip(invites, errors):
+            result["ok"] = error is None
+    return results
 
 def execute_from_analysis(task_analysis):
-    """Execute the function based on the task analysis."""
-    lines = task_analysis.splitlines()
-    function_name = None
-    variables = {}
-
-    # Regular expression to match variable lines
-    var_pattern = re.compile(r'-\s*(\w+)\s*=\s*(.+)')
-
-    for line in lines:
-        if line.startswith("Function:"):
-            function_name = line.split(":", 1)[1].strip()
-        elif line.startswith("Variables:"):
-            continue
-        elif line.strip().startswith("-"):
-            match = var_pattern.match(line.strip())
-            if match:
-                key = match.group(1).strip()
-                value = match.group(2).strip().strip('"').strip("'")
-                # Remove text within parentheses
-                value = re.sub(r'\(.*?\)', '', value).strip()
-                variables[key] = value
-
-    # Debugging: Print extracted variables
+    """Execute the function described by a JSON action reply. Returns True on success."""
+    action = parse_action(task_analysis)
+    if action is None:
+        print("❌ Could not parse the task analysis as a JSON action.")
+        return False
+    return execute_task(action["function"], action["arguments"])
+
+def execute_task(function_name, variables):
+    """Validate and coerce the variables against the function's schema, then run it. Returns True on success."""
     print(f"Function: {function_name}")
     print("Variables:", variables)
 
-    # Convert date strings to datetime objects
-    datetime_format = "%Y-%m-%d %H:%M:%S"
-    try:
-        for key in ['event_start', 'event_end']:
-            if key in variables:
-                # Ensure we strip any non-date text like "datetime:"
-                date_str = re.sub(r'[^0-9\-:\s]', '', variables[key]).strip()
-
-                # Check if the string has seconds, otherwise append ":00"
-                if len(date_str) == 16:  # Format like '2025-03-09 14:00'
-                    date_str += ":00"
-
-                # Convert to datetime object
-                variables[key] = datetime.strptime(date_str, datetime_format).replace(tzinfo=pytz.UTC)
-    
-    except ValueError as e:
-        print(f"❌ Error parsing datetime: {str(e)}")
-        return
+    values, errors = validate_action(function_name, variables)
+    if errors:
+        for field, message in errors.items():
+            print(f"❌ Invalid {field}: {message}")
+        return False
 
-    # Handle execution of the correct function
+    # Handle execution of the correct function; the email senders return an error message instead of raising
+    error = None
     try:
         if function_name == "add_calendar_invite":
-            add_calendar_invite(
-                variables["subject"],
-                variables["body"],
-                variables["to_email"],
-                variables["event_start"],
-                variables["event_end"]
+            error = add_calendar_invite(
+                values["subject"],
+                values["body"],
+                values["to_email"],
+                values["event_start"],
+                values["event_end"]
             )
         elif function_name == "share_stock_price":
-            # Ensure symbol is included, default to 'NVDA' if missing
             share_stock_price(
-                to_email=variables["to_email"], 
-                time_str=variables.get("time_str", "6 PM"),
-                symbol=variables.get("symbol", "NVDA")  # Include symbol dynamically
+                to_email=values["to_email"],
+                time_str=values["time_str"],
+                symbol=values["symbol"]
             )
         elif function_name == "remind_me":
-            remind_me(
-                variables["subject"],
-                variables["body"],
-                variables["to_email"]
+            error = remind_me(
+                values["subject"],
+                values["body"],
+                values["to_email"]
             )
         elif function_name == "send_email":
-            send_email(
-                variables["subject"],
-                variables["body"],
-                variables["to_email"]
+            error = send_email(
+                values["subject"],
+                values["body"],
+                values["to_email"]
             )
-        else:
-            print(f"⚠️ Function {function_name} is not recognized or not implemented.")
 
     except Exception as e:
-        print(f"❌ Error executing function {function_name}: {str(e)}")
+        error = str(e)
+    if error is not None:
+        print(f"❌ Error executing function {function_name}: {error}")
+        return False
+    return True
+
+def organize_folder(directory_path, organizer_llm, root_functions_content, cache=None, approve=ask_user):
+    """Organize files in the specified directory based on LLM analysis.
 
-def organize_folder(directory_path, organizer_llm, root_functions_content):
-    """Organize files in the specified directory based on LLM analysis."""
+    Returns:
+        dict: ``tasks`` (per task: ``task``, ``function``, ``approved`` and the
+        organizer/compressor ``result``) and ``error`` (None on success).
+    """
     directory_path = os.path.normpath(directory_path.strip('"\'').strip())
+    report = {"tasks": [], "error": None}
     if not os.path.exists(directory_path):
         print(f"Error: Directory not found: {directory_path}")
-        return
+        report["error"] = f"Directory not found: {directory_path}"
+        return report
     
     tasks = [
         "Organize files into appropriate category folders",
@@ -211,67 +384,224 @@ def organize_folder(directory_path, organizer_llm, root_functions_content):
     Task 2: [Task 2] - [function name] - [explanation]
     Task 3: [Task 3] - [function name] - [explanation]"""
     
-    analysis = organizer_llm.generate_content(task_prompt)
     print("\n=== Function Analysis ===")    
     try:
-        # Extract function names and explanations from the analysis
-        lines = analysis.text.strip().splitlines()
+        # The built-in tasks are resolved by intent_rules; the LLM is only asked
+        # about tasks the rules do not recognize
         task_functions = {}
-        for line in lines:
-            if line.startswith("Task"):
-                parts = line.split(" - ")
-                if len(parts) >= 3:
-                    task = parts[0].split(": ")[1].strip()
-                    function_name = parts[1].strip()
-                    explanation = parts[2].strip()
-                    task_functions[task] = (function_name, explanation)
-        
-        # Execute tasks based on user confirmation
         for task in tasks:
-            if task in task_functions:
-                function_name, explanation = task_functions[task]
-                print(f"\nTask: {task}")
-                print(f"Function: {function_name}")
-                proceed = input(f"Should I proceed with this task? (yes/no): ")
-                if proceed.lower() == 'yes':
-                    if task == "Organize files into appropriate category folders":
-                        categorize_and_move_files(directory_path, exclude_files=["to_do.txt"])
-                    elif task == "Compress PDF files":
-                        pdfs_folder = os.path.join(directory_path, "PDFs")
-                        if os.path.exists(pdfs_folder):
-                            compress_pdfs_in_folder(pdfs_folder)
-                    elif task == "Compress image files":
-                        images_folder = os.path.join(directory_path, "Images")
-                        if os.path.exists(images_folder):
-                            compress_images_in_folder(images_folder)
+            match = match_task(task)
+            if match and match[2] >= DEFAULT_THRESHOLD:
+                task_functions[task] = (match[0], "matched locally")
+
+        if len(task_functions) < len(tasks):
+            cache_key = make_cache_key(
+                model_name_of(organizer_llm),
+                hashlib.sha256(root_functions_content.encode()).hexdigest(),
+                "\n".join(tasks),
+            )
+            analysis_text = cache.get(cache_key) if cache is not None else None
+            if analysis_text is None:
+                analysis_text = _generate(organizer_llm, task_prompt)
+                if cache is not None:
+                    cache.put(cache_key, analysis_text)
+
+            # Extract function names and explanations from the analysis
+            lines = analysis_text.strip().splitlines()
+            for line in lines:
+                if line.startswith("Task"):
+                    parts = line.split(" - ")
+                    if len(parts) >= 3:
+                        task = parts[0].split(": ")[1].strip()
+                        function_name = parts[1].strip()
+                        explanation = parts[2].strip()
+                        task_functions.setdefault(task, (function_name, explanation))
+        
+        # Execute tasks based on user confirmation; the index lets reruns skip
+        # files that were already compressed
+        with FileIndex(os.path.join(directory_path, INDEX_FILENAME)) as index:
+            for task in tasks:
+                if task in task_functions:
+                    function_name, explanation = task_functions[task]
+                    print(f"\nTask: {task}")
+                    print(f"Function: {function_name}")
+                    entry = {"task": task, "function": function_name, "approved": False, "result": None}
+                    report["tasks"].append(entry)
+                    if approve(function_name, task):
+                        entry["approved"] = True
+                        if task == "Organize files into appropriate category folders":
+                            entry["result"] = categorize_and_move_files(directory_path, exclude_files=["to_do.txt", INDEX_FILENAME])
+                        elif task == "Compress PDF files":
+                            pdfs_folder = os.path.join(directory_path, "PDFs")
+                            if os.path.exists(pdfs_folder):
+                                entry["result"] = compress_pdfs_in_folder(pdfs_folder, index=index)
+                        elif task == "Compress image files":
+                            images_folder = os.path.join(directory_path, "Images")
+                            if os.path.exists(images_folder):
+                                entry["result"] = compress_images_in_folder(images_folder, index=index)
         
         print("\nAll requested operations completed!")
     except Exception as e:
         print(f"Error during execution: {str(e)}")
+        report["error"] = str(e)
+    return report
+
+def process_directory(directory_path, organizer_llm, task_analyzer_llm, root_functions_content, cache=None,
+                      approve=ask_user):
+    """Run the to_do.txt tasks and then the organizer for one directory.
+
+    Returns:
+        dict: Report with ``directory``, ``tasks``, ``organize``, ``elapsed`` and ``error``.
+    """
+    started = time.perf_counter()
+    report = {"directory": directory_path, "tasks": [], "organize": None, "elapsed": 0.0, "error": None}
+    try:
+        # First, analyze tasks in to_do.txt
+        tasks = read_to_do_tasks(directory_path)
+        if tasks:
+            report["tasks"] = analyze_tasks_with_llm(task_analyzer_llm, tasks, root_functions_content, cache=cache,
+                                                     approve=approve)
+        # Then, handle directory organization
+        report["organize"] = organize_folder(directory_path, organizer_llm, root_functions_content, cache=cache,
+                                             approve=approve)
+    except Exception as e:
+        report["error"] = str(e)
+    report["elapsed"] = time.perf_counter() - started
+    return report
+
+def read_manifest(manifest_path):
+    """Read directory paths from a manifest file: one per line, blank lines and # comments ignored."""
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith("#")]
+
+def run_batch(directories, approve, workers=4, organizer_llm=None, task_analyzer_llm=None, cache=None):
+    """Process many directories without any console interaction.
+
+    Directories are handled in parallel by `workers` threads. Models default to
+    the configured Gemini models.
+
+    Returns:
+        list[dict]: One process_directory() report per directory, in input order.
+    """
+    if organizer_llm is None or task_analyzer_llm is None:
+        configure_environment()
+        organizer_llm, task_analyzer_llm = initialize_llms(get_api_key())
+    root_functions_content = load_function_catalog()["text"]
+    cache = cache if cache is not None else LLMResponseCache()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(
+            lambda directory: process_directory(directory, organizer_llm, task_analyzer_llm, root_functions_content,
+                                                cache=cache, approve=approve),
+            directories,
+        ))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Organize folders and run to_do.txt tasks with Gemini.")
+    parser.add_argument("directories", nargs="*", help="Directories to process without prompting")
+    parser.add_argument("--manifest", help="File listing directories to process, one per line")
+    parser.add_argument("--policy", help="JSON auto-approve policy; without it nothing is approved in batch mode")
+    parser.add_argument("--workers", type=int, default=4, help="Directories processed in parallel (default: 4)")
+    parser.add_argument("--report", help="Write the JSON result report to this file instead of stdout")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and organize/compress files in the directories as they arrive")
+    parser.add_argument("--metrics", help="Write a JSON summary of per-stage timings, bytes and errors to this file")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port at /metrics")
+    parser.add_argument("--profile", help="Run under cProfile and save the stats to this file")
+    return parser.parse_args(argv)
+
+def watch_directories(directories, approve, workers=2):
+    """Run watch mode: new files are organized and compressed as they arrive, and new
+    to_do.txt lines are analyzed whenever the file changes."""
+    configure_environment()
+    organizer_llm, task_analyzer_llm = initialize_llms(get_api_key())
+    root_functions_content = load_function_catalog()["text"]
+    cache = LLMResponseCache()
+    seen_tasks = {}
+    seen_lock = threading.Lock()
+
+    def on_todo(directory):
+        tasks = read_to_do_tasks(directory)
+        with seen_lock:
+            # Only lines added since the last load; earlier ones were already handled
+            seen = seen_tasks.setdefault(directory, set())
+            new_tasks = [task for task in tasks if task not in seen]
+            seen.update(new_tasks)
+        if new_tasks:
+            analyze_tasks_with_llm(task_analyzer_llm, new_tasks, root_functions_content, cache=cache, approve=approve)
+
+    get_scheduler()  # Scheduled stock emails fire while the watcher runs
+    for directory in directories:
+        on_todo(directory)
+    watcher = DirectoryWatcher(directories, on_todo=on_todo, workers=workers)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("\nProgram terminated by user. Exiting...")
+
+def main(argv=None):
+    """Main function to run the organization script.
+
+    With directories or --manifest it runs headless (see run_batch); otherwise it
+    asks for a directory and confirms every action on the console. --metrics,
+    --metrics-port and --profile instrument any of the modes.
+    """
+    args = parse_args(argv)
+    report_stream = sys.stdout
+    batch = (args.directories or args.manifest) and not args.watch
+    # In batch mode stdout carries only the JSON report, so progress output goes to stderr
+    with contextlib.redirect_stdout(sys.stderr) if batch else contextlib.nullcontext():
+        if args.metrics_port is not None:
+            serve_prometheus(args.metrics_port)
+        try:
+            if args.profile:
+                with profiled(args.profile):
+                    _run(args, report_stream)
+            else:
+                _run(args, report_stream)
+        finally:
+            if args.metrics:
+                METRICS.write_json(args.metrics)
+                print(f"📊 Metrics written to {args.metrics}")
+
+def _run(args, report_stream=None):
+    directories = list(args.directories)
+    if args.manifest:
+        directories.extend(read_manifest(args.manifest))
+    if directories and args.watch:
+        watch_directories(directories, policy_approver(load_policy(args.policy) if args.policy else set()),
+                          workers=args.workers)
+        return
+    if directories:
+        approve = policy_approver(load_policy(args.policy) if args.policy else set())
+        reports = run_batch(directories, approve, workers=args.workers)
+        output = json.dumps(reports, indent=2, default=str)
+        if args.report:
+            with open(args.report, "w", encoding="utf-8") as f:
+                f.write(output)
+        else:
+            print(output, file=report_stream or sys.stdout, flush=True)
+        return
 
-def main():
-    """Main function to run the organization script."""
     configure_environment()
     api_key = get_api_key()
     organizer_llm, task_analyzer_llm = initialize_llms(api_key)
-    root_functions_content = read_root_functions()
+    # Names, signatures and docstrings only; much smaller than the full source
+    root_functions_content = load_function_catalog()["text"]
+    # Replies for recurring tasks are reused across runs
+    cache = LLMResponseCache()
     
-    # First, analyze tasks in to_do.txt
     directory_path = input("Enter the directory path to organize: ")
-    tasks = read_to_do_tasks(directory_path)
-    if tasks:
-        analyze_tasks_with_llm(task_analyzer_llm, tasks, root_functions_content)
-    
-    # Then, handle directory organization
-    organize_folder(directory_path, organizer_llm, root_functions_content)
+    process_directory(directory_path, organizer_llm, task_analyzer_llm, root_functions_content, cache=cache)
+    print(f"LLM cache: {cache.stats()}")
     
-    # Keep the main program alive while the scheduler is running
-    try:
-        while True:
-            time.sleep(1)  # Avoid excessive CPU usage
-    except KeyboardInterrupt:
-        print("\nProgram terminated by user. Exiting...")
+    # Keep the main program alive while the scheduler has jobs; it sleeps until
+    # the next due time instead of polling
+    scheduler = get_scheduler()
+    if scheduler.jobs():
+        try:
+            scheduler.wait()
+        except KeyboardInterrupt:
+            print("\nProgram terminated by user. Exiting...")
 
 if __name__ == "__main__":
     main()
-
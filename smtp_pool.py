@@ -0,0 +1,176 @@
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import METRICS
+
+def is_connection_error(e):
+    """Return True for errors after which a connection is unusable and a send should be retried.
+
+    smtplib.SMTPException derives from OSError, so protocol errors such as a
+    refused recipient or bad credentials have to be told apart from socket errors.
+    """
+    if isinstance(e, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    return isinstance(e, OSError) and not isinstance(e, smtplib.SMTPException)
+
+class SMTPPool:
+    """Pool of logged-in SMTP sessions, reused across sends.
+
+    Opening a session costs a TCP connect, EHLO, STARTTLS and AUTH round trip;
+    reusing sessions pays that once per connection instead of once per email.
+    Connections idle for longer than `idle_check` seconds are probed with NOOP
+    before reuse, and dropped connections are replaced transparently.
+
+    Args:
+        host (str): SMTP server host
+        port (int): SMTP server port
+        username (str, optional): Login user; no AUTH is attempted without a password
+        password (str, optional): Login password
+        size (int, optional): Maximum number of idle connections kept. Defaults to 2.
+        starttls (bool, optional): Upgrade connections with STARTTLS. Defaults to True.
+        idle_check (float, optional): Seconds of idleness after which a connection
+            is probed before reuse. Defaults to 30.
+        timeout (float, optional): Socket timeout in seconds. Defaults to 30.
+    """
+
+    def __init__(self, host, port, username=None, password=None, size=2, starttls=True,
+                 idle_check=30.0, timeout=30.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.idle_check = idle_check
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._queued = []
+        self._queued_lock = threading.Lock()
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        server.ehlo()
+        if self.starttls:
+            server.starttls()  # Secure the connection
+            server.ehlo()
+        if self.password:
+            server.login(self.username, self.password)
+        return server
+
+    def _checkout(self):
+        while True:
+            try:
+                server, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - last_used < self.idle_check:
+                return server
+            try:
+                server.noop()
+                return server
+            except OSError:
+                self._discard(server)
+
+    def _checkin(self, server):
+        try:
+            self._idle.put_nowait((server, time.monotonic()))
+        except queue.Full:
+            self._discard(server)
+
+    @staticmethod
+    def _discard(server):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    @contextmanager
+    def connection(self):
+        """Borrow a logged-in connection; it is returned to the pool unless the connection broke."""
+        server = self._checkout()
+        try:
+            yield server
+        except BaseException as e:
+            if is_connection_error(e) or not isinstance(e, Exception):
+                self._discard(server)
+            else:
+                self._checkin(server)
+            raise
+        self._checkin(server)
+
+    def send(self, msg, retries=1):
+        """Send one email.message.Message, reconnecting up to `retries` times on connection errors."""
+        with METRICS.timer("smtp_send"):
+            for attempt in range(retries + 1):
+                try:
+                    with self.connection() as server:
+                        server.send_message(msg)
+                    return
+                except OSError as e:
+                    if attempt == retries or not is_connection_error(e):
+                        raise
+
+    def send_bulk(self, messages, retries=1):
+        """Send many messages over a single session.
+
+        If the session drops part-way through, a new one is opened and sending
+        resumes with the message that failed.
+
+        Returns:
+            list: One entry per message, None on success or the exception raised.
+        """
+        results = []
+        messages = list(messages)
+        position = 0
+        reconnects = 0
+        while position < len(messages):
+            try:
+                with self.connection() as server:
+                    while position < len(messages):
+                        started = time.perf_counter()
+                        try:
+                            server.send_message(messages[position])
+                            results.append(None)
+                        except OSError as e:
+                            METRICS.observe("smtp_send", time.perf_counter() - started, errors=1)
+                            if is_connection_error(e):
+                                raise
+                            results.append(e)  # e.g. a refused address; the session is still usable
+                        else:
+                            METRICS.observe("smtp_send", time.perf_counter() - started)
+                        position += 1
+                        reconnects = 0
+            except OSError as e:
+                if not is_connection_error(e):
+                    raise  # Could not log in at all
+                reconnects += 1
+                if reconnects > retries:
+                    results.append(e)
+                    position += 1
+                    reconnects = 0
+        return results
+
+    def queue(self, msg):
+        """Queue a message to be sent by the next flush()."""
+        with self._queued_lock:
+            self._queued.append(msg)
+
+    def flush(self):
+        """Send all queued messages over one session; returns send_bulk() results."""
+        with self._queued_lock:
+            messages, self._queued = self._queued, []
+        return self.send_bulk(messages) if messages else []
+
+    def close(self):
+        """Close all idle connections."""
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(server)
@@ -0,0 +1,53 @@
+import functools
+import json
+import socket
+
+from fakes import FakeSMTPServer
+from function_catalog import load_function_catalog
+from llm_cache import LLMResponseCache
+import Root_functions
+import serve_gemini
+from serve_gemini import execute_task, main
+
+def test_stdout_is_only_the_json_report(capsys, monkeypatch, tmp_path):
+    # Keep the LLM cache and function catalog out of the checkout
+    monkeypatch.setattr(serve_gemini, "LLMResponseCache",
+                        functools.partial(LLMResponseCache, db_path=str(tmp_path / "llm_cache.db")))
+    monkeypatch.setattr(serve_gemini, "load_function_catalog",
+                        functools.partial(load_function_catalog, cache_path=str(tmp_path / "catalog.json")))
+    folder = tmp_path / "folder"
+    folder.mkdir()
+    (folder / "notes.txt").write_text("hello")
+    (folder / "to_do.txt").write_text("Organize files into appropriate category folders\n")
+    policy = tmp_path / "policy.json"
+    policy.write_text(json.dumps({"allow": ["categorize_and_move_files"]}))
+
+    main([str(folder), "--policy", str(policy), "--workers", "1"])
+
+    out, err = capsys.readouterr()
+    reports = json.loads(out)
+    assert len(reports) == 1
+    assert "===" in err
+    assert (folder / "Documents" / "notes.txt").exists()
+
+def _point_smtp_at(monkeypatch, port):
+    monkeypatch.setenv("SMTP_HOST", "127.0.0.1")
+    monkeypatch.setenv("SMTP_PORT", str(port))
+    monkeypatch.setenv("SMTP_STARTTLS", "0")
+    Root_functions._smtp_pool.cache_clear()
+
+def test_execute_task_reports_smtp_failures(monkeypatch):
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        port = unused.getsockname()[1]  # Nothing listens here once the socket is closed
+    _point_smtp_at(monkeypatch, port)
+
+    arguments = {"subject": "Hi", "body": "Hello", "to_email": "me@example.com"}
+    assert execute_task("send_email", arguments) is False
+    assert execute_task("remind_me", arguments) is False
+
+def test_execute_task_reports_sent_emails(monkeypatch):
+    with FakeSMTPServer() as server:
+        _point_smtp_at(monkeypatch, server.port)
+        assert execute_task("send_email", {"subject": "Hi", "body": "Hello", "to_email": "me@example.com"}) is True
+    assert len(server.messages) == 1
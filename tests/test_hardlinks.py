@@ -0,0 +1,53 @@
+import os
+
+from fakes import FakeConvertAPIServer
+import Root_functions
+from Root_functions import categorize_and_move_files, compress_images_in_folder, compress_pdfs_in_folder
+from metrics import METRICS
+
+from test_pdf_compression import PDF
+
+def _noisy_png(path):
+    from PIL import Image
+
+    Image.effect_noise((256, 256), 64).convert("RGB").save(path, format="PNG")
+
+def test_hardlinked_images_are_compressed_once(tmp_path):
+    _noisy_png(tmp_path / "a.png")
+    os.link(tmp_path / "a.png", tmp_path / "b.png")
+
+    results = compress_images_in_folder(str(tmp_path), workers=1)
+
+    assert len(results) == 1
+    assert results[0]["links"] == [str(tmp_path / "compressed_b.png")]
+    assert sorted(os.listdir(tmp_path)) == ["compressed_a.png", "compressed_b.png"]
+    assert os.path.samefile(tmp_path / "compressed_a.png", tmp_path / "compressed_b.png")
+
+def test_hardlinked_pdfs_stay_linked(monkeypatch, tmp_path):
+    (tmp_path / "a.pdf").write_bytes(PDF)
+    os.link(tmp_path / "a.pdf", tmp_path / "b.pdf")
+    (tmp_path / "c.pdf").write_bytes(PDF)
+
+    with FakeConvertAPIServer() as server:
+        monkeypatch.setenv("CONVERTAPI_SECRET", "test")
+        monkeypatch.setenv("CONVERTAPI_BASE_URI", server.base_uri)
+        Root_functions._convertapi_client.cache_clear()
+        results = compress_pdfs_in_folder(str(tmp_path), backend="convertapi")
+
+    assert len(server.calls) == 2
+    assert sorted(r["file"] for r in results) == ["a.pdf", "c.pdf"]
+    assert os.path.samefile(tmp_path / "a.pdf", tmp_path / "b.pdf")
+    assert (tmp_path / "b.pdf").stat().st_size < len(PDF)
+    assert sorted(os.listdir(tmp_path)) == ["a.pdf", "b.pdf", "c.pdf"]
+
+def test_name_collisions_are_not_move_errors(tmp_path):
+    (tmp_path / "notes.txt").write_text("one")
+    os.makedirs(tmp_path / "Documents")
+    (tmp_path / "Documents" / "notes.txt").write_text("two")
+    METRICS.reset()
+
+    categorize_and_move_files(str(tmp_path))
+
+    stage = METRICS.summary()["stages"]["move"]
+    assert (stage["count"], stage["errors"]) == (1, 0)
+    assert (tmp_path / "Documents" / "notes (1).txt").read_text() == "one"
@@ -0,0 +1,50 @@
+import pytest
+
+from intent_rules import DEFAULT_THRESHOLD, match_task
+
+@pytest.mark.parametrize("task", [
+    "Email me the Broadcom stock price. My email is me@example.com",
+    "Send the stock price ASAP to me@example.com at 5 PM",
+    "Send the AVGO stock price to me@example.com",
+])
+def test_defaulted_stock_arguments_go_to_the_llm(task):
+    function_name, _, confidence = match_task(task)
+    assert function_name == "share_stock_price"
+    assert confidence < DEFAULT_THRESHOLD
+
+@pytest.mark.parametrize("task, symbol", [
+    ("Send the NVIDIA stock price to me@example.com at 5 PM", "NVDA"),
+    ("Send the $avgo stock price to me@example.com at 5 PM", "AVGO"),
+    ("Send the AVGO stock price ASAP to me@example.com at 5 PM", "AVGO"),
+])
+def test_named_symbol_and_time_are_trusted(task, symbol):
+    function_name, variables, confidence = match_task(task)
+    assert (function_name, variables["symbol"], variables["time_str"]) == ("share_stock_price", symbol, "5 PM")
+    assert confidence >= DEFAULT_THRESHOLD
+
+@pytest.mark.parametrize("task", [
+    "Send the stock price update for GOOGL and AAPL to me@example.com at 9 AM",
+    "Send the Apple and Tesla stock price to me@example.com at 9 AM",
+])
+def test_several_symbols_go_to_the_llm(task):
+    function_name, _, confidence = match_task(task)
+    assert function_name == "share_stock_price"
+    assert confidence < DEFAULT_THRESHOLD
+
+@pytest.mark.parametrize("task, subject", [
+    ("Schedule a meeting with a@b.com on 2025-03-09 14:00", "with"),
+    ("Send an invite for the 2025-03-09 14:00 call to a@b.com", "the"),
+])
+def test_fragment_calendar_titles_go_to_the_llm(task, subject):
+    function_name, variables, confidence = match_task(task)
+    assert (function_name, variables["subject"]) == ("add_calendar_invite", subject)
+    assert confidence < DEFAULT_THRESHOLD
+
+@pytest.mark.parametrize("task, subject", [
+    ('Add a calendar invite for "Sync" on 2030-01-02 10:00 for 1 hour to me@example.com', "Sync"),
+    ("Add a meeting for Quarterly planning review on 2030-01-02 10:00 to me@example.com", "Quarterly planning review"),
+])
+def test_real_calendar_titles_are_trusted(task, subject):
+    function_name, variables, confidence = match_task(task)
+    assert (function_name, variables["subject"]) == ("add_calendar_invite", subject)
+    assert confidence >= DEFAULT_THRESHOLD
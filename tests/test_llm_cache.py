@@ -0,0 +1,32 @@
+from benchmark import fake_llm_reply, make_tasks
+from fakes import FakeModel
+from llm_cache import LLMResponseCache
+from serve_gemini import analyze_tasks_with_llm
+
+CATALOG = "remind_me, send_email, add_calendar_invite, share_stock_price"
+
+def _analyze(cache, tasks):
+    model = FakeModel(fake_llm_reply)
+    # rule_threshold above 1 sends every task to the model; approving nothing keeps the run offline
+    analyze_tasks_with_llm(model, tasks, CATALOG, cache=cache, rule_threshold=1.1, approve=lambda *args: False)
+    return model
+
+def test_second_run_is_answered_from_the_cache(tmp_path):
+    tasks = make_tasks(6)
+    cache = LLMResponseCache(db_path=str(tmp_path / "cache.db"))
+
+    first = _analyze(cache, tasks)
+    assert first.prompts
+    assert cache.stats() == {"hits": 0, "misses": 6, "entries": 6}
+
+    second = _analyze(cache, tasks)
+    assert second.prompts == []
+    assert cache.stats() == {"hits": 6, "misses": 6, "entries": 6}
+
+def test_cache_persists_across_instances(tmp_path):
+    tasks = make_tasks(3)
+    _analyze(LLMResponseCache(db_path=str(tmp_path / "cache.db")), tasks)
+
+    reopened = LLMResponseCache(db_path=str(tmp_path / "cache.db"))
+    assert _analyze(reopened, tasks).prompts == []
+    assert reopened.stats()["hits"] == 3
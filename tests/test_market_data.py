@@ -0,0 +1,18 @@
+from fakes import FakeQuoteProvider
+import market_data
+from market_data import QuoteService, set_quote_provider
+from Root_functions import get_stock_price
+
+def test_retries_are_per_request():
+    service = QuoteService(FakeQuoteProvider({"NVDA": 100.0}, fail_first=1), batch_window=0, ttl=0)
+
+    assert service.get_quote("NVDA", retries=0) is None
+    assert service.get_quote("NVDA", retries=1, backoff=0.01) == 100.0
+    assert (service.retries, service.backoff) == (3, 5.0)
+
+def test_get_stock_price_leaves_the_shared_service_alone(monkeypatch):
+    monkeypatch.setattr(market_data, "_default_service", None)  # Restored after the test
+    service = set_quote_provider(FakeQuoteProvider({"AAPL": 200.0}, fail_first=1), batch_window=0)
+
+    assert get_stock_price("AAPL", retries=1, wait_time=0.01) == 200.0
+    assert (service.retries, service.backoff) == (3, 5.0)
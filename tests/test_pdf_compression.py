@@ -0,0 +1,57 @@
+import pytest
+
+from fakes import FakeConvertAPIServer
+import Root_functions
+from Root_functions import compress_pdfs_in_folder
+
+PDF = b"%PDF-1.4\n" + b"1 0 obj   <<   /Type   /Catalog   >>   endobj\n" * 50 + b"%%EOF\n"
+
+@pytest.fixture
+def pdf_folder(tmp_path):
+    for n in range(6):
+        (tmp_path / f"doc{n}.pdf").write_bytes(PDF)
+    return tmp_path
+
+def _use_fake(monkeypatch, server):
+    monkeypatch.setenv("CONVERTAPI_SECRET", "test")
+    monkeypatch.setenv("CONVERTAPI_BASE_URI", server.base_uri)
+    Root_functions._convertapi_client.cache_clear()
+
+def test_transient_errors_are_retried(monkeypatch, pdf_folder):
+    with FakeConvertAPIServer(fail_first=2) as server:
+        _use_fake(monkeypatch, server)
+        results = compress_pdfs_in_folder(str(pdf_folder), rate=5, retries=3, backend="convertapi")
+
+    assert len(results) == 6
+    assert [r["error"] for r in results] == [None] * 6
+    assert sum(r["attempts"] for r in results) == 6 + 2
+    assert len(server.calls) == 8
+    for path in pdf_folder.iterdir():
+        assert path.stat().st_size < len(PDF)
+
+def test_rate_limit_keeps_under_server_limit(monkeypatch, pdf_folder):
+    with FakeConvertAPIServer(max_rps=3) as server:
+        _use_fake(monkeypatch, server)
+        results = compress_pdfs_in_folder(str(pdf_folder), rate=3, retries=3, backend="convertapi")
+
+    assert [r["error"] for r in results] == [None] * 6
+    assert sum(r["attempts"] for r in results) == len(server.calls)
+
+def test_gives_up_after_retries(monkeypatch, pdf_folder):
+    with FakeConvertAPIServer(fail_first=100) as server:
+        _use_fake(monkeypatch, server)
+        results = compress_pdfs_in_folder(str(pdf_folder), workers=1, retries=0, backend="convertapi")
+
+    assert all(r["error"] for r in results)
+    assert all(r["attempts"] == 1 for r in results)
+    assert {p.read_bytes() for p in pdf_folder.iterdir()} == {PDF}
+
+def test_compress_file_does_not_retry_the_local_backend(monkeypatch, tmp_path):
+    monkeypatch.setenv("PDF_BACKEND", "local")
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"not a pdf")
+
+    result = Root_functions.compress_file(str(broken))
+
+    assert result["error"]
+    assert result["attempts"] == 1
@@ -0,0 +1,37 @@
+import os
+
+import pytest
+from PyPDF2 import PdfWriter
+
+import pdf_local
+from pdf_local import compress_pdf_local
+
+@pytest.fixture
+def small_pdf(tmp_path):
+    writer = PdfWriter()
+    writer.add_blank_page(width=200, height=200)
+    path = tmp_path / "small.pdf"
+    with open(path, "wb") as f:
+        writer.write(f)
+    return path
+
+def test_original_is_kept_when_output_is_not_smaller(small_pdf):
+    original = small_pdf.read_bytes()
+    inode = small_pdf.stat().st_ino
+
+    compress_pdf_local(str(small_pdf))
+
+    assert small_pdf.read_bytes() == original
+    assert small_pdf.stat().st_ino == inode
+    assert os.listdir(small_pdf.parent) == ["small.pdf"]
+
+def test_temp_file_is_removed_on_failure(monkeypatch, small_pdf):
+    def fail(self, stream):
+        stream.write(b"%PDF-partial")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(pdf_local.PdfWriter, "write", fail)
+    with pytest.raises(OSError):
+        compress_pdf_local(str(small_pdf), str(small_pdf.parent / "out.pdf"))
+
+    assert os.listdir(small_pdf.parent) == ["small.pdf"]
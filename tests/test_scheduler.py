@@ -0,0 +1,64 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from scheduler import Scheduler
+
+FIRED = []
+FIRED_LOCK = threading.Lock()
+
+def record(label):
+    with FIRED_LOCK:
+        FIRED.append(label)
+
+def _soon(seconds):
+    return (datetime.now() + timedelta(seconds=seconds)).strftime("%H:%M:%S")
+
+def test_jobs_added_elsewhere_are_kept_and_fired_once(tmp_path):
+    store = str(tmp_path / "jobs.json")
+    # Two processes sharing a store: a running daemon and a later headless run
+    daemon = Scheduler(store_path=store, reload_interval=0.1).start()
+    other = Scheduler(store_path=store, reload_interval=0.1).start()
+    try:
+        other.add_daily("stock", "test_scheduler:record", {"label": "stock"}, at=_soon(2))
+        daemon.add_daily("reminder", "test_scheduler:record", {"label": "reminder"}, at="03:00")
+
+        assert {job["id"] for job in daemon.jobs()} == {"stock", "reminder"}
+        assert {job["id"] for job in Scheduler(store_path=store).jobs()} == {"stock", "reminder"}
+
+        deadline = time.time() + 10
+        while not FIRED and time.time() < deadline:
+            time.sleep(0.1)
+        time.sleep(0.5)
+    finally:
+        daemon.stop()
+        other.stop()
+    assert FIRED == ["stock"]
+
+def test_remove_is_seen_by_other_schedulers(tmp_path):
+    store = str(tmp_path / "jobs.json")
+    first, second = Scheduler(store_path=store), Scheduler(store_path=store)
+    first.add_daily("job", "test_scheduler:record", {"label": "job"}, at="03:00")
+    assert [job["id"] for job in second.jobs()] == ["job"]
+    assert second.remove("job")
+    assert first.jobs() == []
+
+def _share(monkeypatch, offset):
+    import Root_functions
+
+    scheduler, sent = Scheduler(store_path=None), []
+    monkeypatch.setattr(Root_functions, "get_scheduler", lambda: scheduler)
+    monkeypatch.setattr(Root_functions, "send_stock_email", lambda *args: sent.append(args))
+    at = datetime.now() + timedelta(seconds=offset)
+    Root_functions.share_stock_price("me@example.com", at.strftime("%I:%M:%S %p"), "NVDA")
+    return scheduler.jobs()[0]["next_run"] - time.time(), sent
+
+def test_stock_time_still_ahead_is_left_to_the_scheduler(monkeypatch):
+    delay, sent = _share(monkeypatch, 35)
+    assert sent == []
+    assert 0 < delay < 40
+
+def test_stock_time_just_passed_is_sent_once_now(monkeypatch):
+    delay, sent = _share(monkeypatch, -10)
+    assert len(sent) == 1
+    assert delay > 23 * 3600
@@ -0,0 +1,55 @@
+from email.message import EmailMessage
+
+import pytest
+
+from fakes import FakeSMTPServer
+from smtp_pool import SMTPPool
+
+def _message(to):
+    msg = EmailMessage()
+    msg["From"], msg["To"], msg["Subject"] = "me@example.com", to, "Hi"
+    msg.set_content("Hello")
+    return msg
+
+@pytest.fixture
+def smtp():
+    with FakeSMTPServer(refuse={"nobody@example.com"}, drop_after=3) as server:
+        yield server
+
+def test_send_bulk_uses_one_session(smtp):
+    pool = SMTPPool(smtp.host, smtp.port, starttls=False)
+
+    results = pool.send_bulk([_message(f"user{i}@example.com") for i in range(3)])
+
+    assert results == [None, None, None]
+    assert smtp.connections == 1
+    assert len(smtp.messages) == 3
+
+def test_send_bulk_resumes_after_a_dropped_connection(smtp):
+    pool = SMTPPool(smtp.host, smtp.port, starttls=False)
+
+    results = pool.send_bulk([_message(f"user{i}@example.com") for i in range(7)])
+
+    assert results == [None] * 7
+    assert [m["to"] for m in smtp.messages] == [[f"user{i}@example.com"] for i in range(7)]
+    assert smtp.connections == 3
+
+def test_send_bulk_reports_refused_recipients(smtp):
+    pool = SMTPPool(smtp.host, smtp.port, starttls=False)
+
+    results = pool.send_bulk([_message("a@example.com"), _message("nobody@example.com"), _message("b@example.com")])
+
+    assert results[0] is None and results[2] is None
+    assert results[1] is not None
+    assert smtp.connections == 1
+    assert len(smtp.messages) == 2
+
+def test_send_reconnects_after_the_server_hangs_up():
+    with FakeSMTPServer(drop_after=1) as smtp:
+        pool = SMTPPool(smtp.host, smtp.port, starttls=False)
+        pool.send(_message("a@example.com"))
+        # The pooled session was closed by the server after one message
+        pool.send(_message("b@example.com"))
+
+    assert len(smtp.messages) == 2
+    assert smtp.connections == 2
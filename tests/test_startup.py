@@ -0,0 +1,27 @@
+import json
+import os
+import subprocess
+import sys
+
+from benchmark import HEAVY_MODULES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous compared with the benchmark's 1 s budget; this catches a heavy top-level import, not jitter
+IMPORT_BUDGET = 5.0
+
+IMPORT_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import serve_gemini
+seconds = time.perf_counter() - started
+print(json.dumps({"seconds": seconds, "heavy": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+def test_importing_serve_gemini_skips_heavy_backends():
+    process = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], cwd=ROOT, check=True,
+                             capture_output=True, text=True)
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+
+    assert result["heavy"] == []
+    assert result["seconds"] < IMPORT_BUDGET
@@ -0,0 +1,157 @@
+"""Watch mode: organize and compress files as they arrive.
+
+DirectoryWatcher watches the top level of each target directory, using inotify
+when the optional inotify_simple package is installed and a scandir polling
+loop otherwise. Bursts of events for a file are debounced until the file has
+been quiet for `debounce` seconds; the file is then moved into its category
+folder and compressed on a background worker pool. Changes to to_do.txt are
+handed to an on_todo callback instead.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from Root_functions import categorize_file, compress_file
+from file_index import FileIndex, INDEX_FILENAME
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:  # Not on Linux, or the optional dependency is missing
+    INotify = None
+
+TODO_FILENAME = "to_do.txt"
+
+class DirectoryWatcher:
+    """Watch directories and route each new file through the organizer and compressors.
+
+    Args:
+        directories (list): Directories to watch (top level only; category folders are ignored)
+        on_todo (callable, optional): Called as on_todo(directory) when to_do.txt changes
+        debounce (float, optional): Seconds a file must be quiet before it is handled. Defaults to 2.
+        poll_interval (float, optional): Seconds between scans in polling mode. Defaults to 1.
+        workers (int, optional): Background workers for organize/compress jobs. Defaults to 2.
+        compress (bool, optional): Compress images and PDFs after moving them. Defaults to True.
+        process_existing (bool, optional): Also handle files already present at start. Defaults to False.
+        use_inotify (bool, optional): Use inotify when available. Defaults to True.
+    """
+
+    def __init__(self, directories, on_todo=None, debounce=2.0, poll_interval=1.0, workers=2, compress=True,
+                 process_existing=False, use_inotify=True):
+        self.directories = [os.path.abspath(d) for d in directories]
+        self.on_todo = on_todo
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.compress = compress
+        self.process_existing = process_existing
+        self.use_inotify = use_inotify and INotify is not None
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="watcher")
+        self._indexes = {d: FileIndex(os.path.join(d, INDEX_FILENAME)) for d in self.directories}
+        self._pending = {}
+        self._snapshots = {}
+        self._stop = threading.Event()
+
+    @staticmethod
+    def _ignored(name):
+        # Hidden names cover the index database and the temporary files of atomic writes
+        return name.startswith(".")
+
+    def _scan(self, directory):
+        """Return {name: (size, mtime_ns)} for the regular files directly in directory."""
+        snapshot = {}
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not self._ignored(entry.name) and entry.is_file(follow_symlinks=False):
+                    st = entry.stat(follow_symlinks=False)
+                    snapshot[entry.name] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def _touch(self, directory, name):
+        """Record activity on a file; it is handled once quiet for `debounce` seconds."""
+        if not self._ignored(name):
+            self._pending[(directory, name)] = time.monotonic()
+
+    def _poll(self):
+        for directory in self.directories:
+            snapshot = self._scan(directory)
+            previous = self._snapshots.get(directory, {})
+            for name, signature in snapshot.items():
+                if previous.get(name) != signature:
+                    self._touch(directory, name)
+            self._snapshots[directory] = snapshot
+
+    def _dispatch_quiet(self):
+        now = time.monotonic()
+        for key, last_seen in list(self._pending.items()):
+            if now - last_seen < self.debounce:
+                continue
+            del self._pending[key]
+            directory, name = key
+            path = os.path.join(directory, name)
+            if not os.path.isfile(path):
+                continue
+            if name == TODO_FILENAME:
+                if self.on_todo is not None:
+                    self._pool.submit(self._run_todo, directory)
+            else:
+                self._pool.submit(self._handle_file, directory, path)
+
+    def _run_todo(self, directory):
+        try:
+            self.on_todo(directory)
+        except Exception as e:
+            print(f"✗ Error handling {TODO_FILENAME} in {directory}: {str(e)}")
+
+    def _handle_file(self, directory, path):
+        try:
+            destination = categorize_file(directory, path)
+            if destination is None:
+                return
+            print(f"✓ Organized: {os.path.relpath(destination, directory)}")
+            if self.compress:
+                result = compress_file(destination, index=self._indexes[directory])
+                if result and result["error"]:
+                    print(f"✗ Error compressing {result['file']}: {result['error']}")
+                elif result:
+                    print(f"✓ Compressed: {result['file']} ({result['bytes_saved']} bytes saved)")
+        except Exception as e:
+            print(f"✗ Error handling {path}: {str(e)}")
+
+    def run(self):
+        """Watch until stop() is called or KeyboardInterrupt."""
+        for directory in self.directories:
+            self._snapshots[directory] = {} if self.process_existing else self._scan(directory)
+        print(f"👀 Watching {', '.join(self.directories)} ({'inotify' if self.use_inotify else 'polling'})")
+        try:
+            if self.use_inotify:
+                self._run_inotify()
+            else:
+                while not self._stop.is_set():
+                    self._poll()
+                    self._dispatch_quiet()
+                    self._stop.wait(self.poll_interval)
+        finally:
+            self._pool.shutdown(wait=True)
+            for index in self._indexes.values():
+                index.close()
+
+    def _run_inotify(self):
+        inotify = INotify()
+        watches = {
+            inotify.add_watch(directory, flags.CLOSE_WRITE | flags.MOVED_TO | flags.MODIFY): directory
+            for directory in self.directories
+        }
+        if self.process_existing:
+            self._poll()
+        try:
+            while not self._stop.is_set():
+                # Wake up at least every debounce interval to dispatch quiet files
+                for event in inotify.read(timeout=int(max(self.debounce, 0.1) * 1000)):
+                    if event.name and event.wd in watches:
+                        self._touch(watches[event.wd], event.name)
+                self._dispatch_quiet()
+        finally:
+            inotify.close()
+
+    def stop(self):
+        self._stop.set()